@@ -0,0 +1,300 @@
+"""Benchmark the theme generators and the shared colour math.
+
+Each benchmark times a callable over a fixed theme set: the two shipped
+themes plus ``--variants`` generated variants. Colour caches are cleared
+before every repetition so each one measures the work of a cold build;
+generator benchmarks then resolve the themes untimed, so a regression in
+one generator is not buried under the shared ``resolve_theme`` work.
+Results are written as JSON and can be compared against a stored baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import color_space
+import composite
+import fish_theme
+import ghostty
+import quantize
+import sublime
+import tmux
+import vscode
+import zed_theme
+import zellij
+from color_cache import clear_caches
+from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
+from resolved_theme import resolve_theme
+from variants import VariantCandidates, enumerate_variants
+
+DEFAULT_REPEAT = 5
+DEFAULT_VARIANTS = 20
+DEFAULT_THRESHOLD = 0.10
+
+BENCH_CANDIDATES = VariantCandidates(
+    backgrounds=("paper", "white", "wheat", "slate", "black-90", "black-80"),
+    body_texts=("body-text", "black-80", "slate", "black", "white", "black-10"),
+    comment_texts=("muted-text", "black-60", "black-70", "black-30", "black-20"),
+    selections=("wheat", "sky", "black-70", "black-60", "oxford-40", "black-20"),
+)
+
+Benchmark = Callable[[Sequence[ThemeDefinition]], object]
+
+
+def bench_themes(variants: int) -> Tuple[ThemeDefinition, ...]:
+    """Return the shipped themes followed by ``variants`` generated ones."""
+
+    generated = itertools.islice(enumerate_variants(BENCH_CANDIDATES), variants)
+    return (STANDARD_THEME, INVERSE_THEME, *generated)
+
+
+def colour_pairs(themes: Sequence[ThemeDefinition]) -> List[Tuple[str, str, str]]:
+    """Return (colour, background, fallback) triples drawn from the themes."""
+
+    pairs = []
+    for theme in themes:
+        background = theme.background.hex_value
+        fallback = theme.body_text.hex_value
+        for name in ghostty.ANSI_PALETTE_NAMES:
+            pairs.append((get_color(name).hex_value, background, fallback))
+    return pairs
+
+
+def _per_theme(func: Callable[[ThemeDefinition], object]) -> Benchmark:
+    def run(themes: Sequence[ThemeDefinition]) -> None:
+        for theme in themes:
+            func(theme)
+
+    return run
+
+
+def _mix_colors(themes: Sequence[ThemeDefinition]) -> None:
+    for color, background, _ in colour_pairs(themes):
+        for amount in (0.1, 0.3, 0.5):
+            ghostty.mix_colors(color, background, amount)
+
+
+def _oklab_mix(themes: Sequence[ThemeDefinition]) -> None:
+    pairs = colour_pairs(themes)
+    colors = [color for color, _, _ in pairs]
+    backgrounds = [background for _, background, _ in pairs]
+    for amount in (0.1, 0.3, 0.5):
+        color_space.mix(colors, backgrounds, amount)
+
+
+def _flatten(themes: Sequence[ThemeDefinition]) -> None:
+    pairs = colour_pairs(themes)
+    backgrounds = [background for _, background, _ in pairs]
+    for alpha in ("33", "80", "cc"):
+        composite.flatten([color + alpha for color, _, _ in pairs], backgrounds)
+
+
+def _quantize(themes: Sequence[ThemeDefinition]) -> None:
+    colors = [color for color, _, _ in colour_pairs(themes)]
+    for mode in ("256", "16"):
+        quantize.quantize_all(colors, mode)
+
+
+def _contrast_ratio(themes: Sequence[ThemeDefinition]) -> None:
+    for color, background, _ in colour_pairs(themes):
+        ghostty.contrast_ratio(color, background)
+
+
+def _ensure_contrast(themes: Sequence[ThemeDefinition]) -> None:
+    for color, background, fallback in colour_pairs(themes):
+        ghostty.ensure_contrast(color, background, fallback)
+
+
+def _end_to_end(themes: Sequence[ThemeDefinition]) -> None:
+    """Build every target's payload for every theme and serialize it in memory."""
+
+    "".join(zed_theme.iter_bundle_json(themes))
+    for theme in themes:
+        json.dumps(vscode.build_theme_payload(theme), indent=2)
+        json.dumps(sublime.build_color_scheme(theme), indent=2)
+        "\n".join(ghostty.build_theme_lines(theme, ghostty.build_palette_values(theme)))
+        "\n".join(tmux.build_theme_lines(theme))
+        "\n".join(zellij.build_theme_lines(theme))
+        "\n".join(fish_theme.build_theme_lines(theme))
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "resolved.resolve_theme": _per_theme(resolve_theme),
+    "zed.build_style": _per_theme(zed_theme.build_style),
+    "zed.build_theme": _per_theme(zed_theme.build_theme),
+    "ghostty.build_palette_values": _per_theme(ghostty.build_palette_values),
+    "tmux.build_theme_lines": _per_theme(tmux.build_theme_lines),
+    "zellij.build_theme_lines": _per_theme(zellij.build_theme_lines),
+    "vscode.build_theme_payload": _per_theme(vscode.build_theme_payload),
+    "sublime.build_color_scheme": _per_theme(sublime.build_color_scheme),
+    "color.mix_colors": _mix_colors,
+    "color_space.mix": _oklab_mix,
+    "quantize.quantize_all": _quantize,
+    "composite.flatten": _flatten,
+    "color.contrast_ratio": _contrast_ratio,
+    "color.ensure_contrast": _ensure_contrast,
+    "build.end_to_end": _end_to_end,
+}
+
+
+def _resolve_all(themes: Sequence[ThemeDefinition]) -> None:
+    for theme in themes:
+        resolve_theme(theme)
+
+
+# Generator benchmarks start from resolved themes, so they time each
+# generator's own work; the shared resolve and ANSI solve are timed by
+# resolved.resolve_theme.
+SETUPS: Dict[str, Benchmark] = {
+    name: _resolve_all
+    for name in BENCHMARKS
+    if name.split(".", 1)[0] in ("zed", "ghostty", "tmux", "zellij", "vscode", "sublime")
+}
+
+
+def time_benchmark(
+    bench: Benchmark,
+    themes: Sequence[ThemeDefinition],
+    repeat: int,
+    setup: Optional[Benchmark] = None,
+) -> Dict[str, float]:
+    """Time ``repeat`` cold runs of a benchmark and summarise them in seconds.
+
+    ``setup`` runs after the caches are cleared and is not timed.
+    """
+
+    samples = []
+    for _ in range(repeat):
+        clear_caches()
+        if setup is not None:
+            setup(themes)
+        start = time.perf_counter()
+        bench(themes)
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(
+    repeat: int = DEFAULT_REPEAT,
+    variants: int = DEFAULT_VARIANTS,
+    names: Optional[Sequence[str]] = None,
+) -> Dict[str, object]:
+    """Run the selected benchmarks and return a JSON-serializable report."""
+
+    themes = bench_themes(variants)
+    selected = list(BENCHMARKS) if not names else list(names)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "themes": len(themes),
+        },
+        "results": {
+            name: time_benchmark(BENCHMARKS[name], themes, repeat, SETUPS.get(name))
+            for name in selected
+        },
+    }
+
+
+def compare(
+    report: Dict[str, object], baseline: Dict[str, object], threshold: float
+) -> List[str]:
+    """Return a line per regressed benchmark (median slower than the threshold)."""
+
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, result in report["results"].items():
+        base = base_results.get(name)
+        if not base or not base["median"]:
+            continue
+        change = result["median"] / base["median"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{name}: {base['median'] * 1000:.3f} ms -> "
+                f"{result['median'] * 1000:.3f} ms (+{change * 100:.0f}%)"
+            )
+    return regressions
+
+
+def format_report(report: Dict[str, object], baseline: Optional[Dict[str, object]]) -> str:
+    """Render the report as a table, with the change against a baseline if given."""
+
+    base_results = baseline.get("results", {}) if baseline else {}
+    lines = [f"{'benchmark':<30} {'median':>10} {'min':>10} {'vs base':>8}"]
+    for name, result in report["results"].items():
+        base = base_results.get(name)
+        delta = ""
+        if base and base["median"]:
+            delta = f"{(result['median'] / base['median'] - 1) * 100:+.0f}%"
+        lines.append(
+            f"{name:<30} {result['median'] * 1000:8.3f}ms {result['min'] * 1000:8.3f}ms"
+            f" {delta:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the benchmarks, write JSON results and check for regressions."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "-n",
+        "--variants",
+        type=int,
+        default=DEFAULT_VARIANTS,
+        help="generated variants to add to the two shipped themes",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write results as JSON")
+    parser.add_argument("-b", "--baseline", type=Path, help="compare against a JSON result")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed median slowdown against the baseline (default: %(default)s)",
+    )
+    parser.add_argument("--list", action="store_true", help="list benchmark names")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+
+    report = run_benchmarks(args.repeat, args.variants, args.benchmarks)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print(format_report(report, baseline))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"wrote {args.output}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("regressions:")
+            print("\n".join(f"  {line}" for line in regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""Build every FT theme target from a single interpreter.
+
+The generators are imported once and scheduled as a small job graph on a
+thread pool, so the palette and theme definitions are shared by all targets
+instead of being rebuilt by one ``python3 <target>.py`` process per target.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import build_cache
+import color_cache
+import fish_theme
+import ft_palette
+import ghostty
+import instrument
+import output
+import palette_snap
+import palette_store
+import sublime
+import tmux
+import vscode
+import zed_theme
+import zellij
+from ft_palette import ThemeDefinition
+from quantize import COLOR_MODES
+
+BUILD_DIR = Path("build")
+VSCODE_OUT_DIR = BUILD_DIR / "vscode"
+
+# Generator module behind each target; its sources feed the build cache key.
+TARGET_MODULES: Dict[str, str] = {
+    "vscode": "vscode",
+    "zed": "zed_theme",
+    "ghostty": "ghostty",
+    "fish": "fish_theme",
+    "sublime": "sublime",
+    "tmux": "tmux",
+    "zellij": "zellij",
+}
+
+# Per-target scripts the Makefile used to run one after another, in order.
+SERIAL_SCRIPTS: Dict[str, str] = {
+    "vscode": "vscode.py",
+    "zed": "zed_theme.py",
+    "ghostty": "ghostty.py",
+    "fish": "fish_theme.py",
+    "sublime": "sublime.py",
+    "tmux": "tmux.py",
+    "zellij": "zellij.py",
+}
+
+
+@dataclass(frozen=True)
+class Job:
+    """A named unit of build work and the jobs that must finish before it."""
+
+    name: str
+    run: Callable[[], object]
+    depends_on: Tuple[str, ...] = ()
+
+    @property
+    def target(self) -> str:
+        """Return the target this job belongs to (``vscode.package`` -> ``vscode``)."""
+
+        return self.name.split(".", 1)[0]
+
+
+def default_themes() -> Tuple[ThemeDefinition, ...]:
+    """Return the shipped themes, read from ft_palette at call time."""
+
+    return (ft_palette.STANDARD_THEME, ft_palette.INVERSE_THEME)
+
+
+def default_jobs(
+    themes: Optional[Sequence[ThemeDefinition]] = None,
+    package: bool = True,
+    minify: bool = False,
+    colors: str = "truecolor",
+) -> List[Job]:
+    """Return the job graph that builds every target for ``themes``."""
+
+    if themes is None:
+        themes = default_themes()
+
+    jobs = [
+        Job("vscode", lambda: vscode.write_extension(themes, VSCODE_OUT_DIR)),
+        Job("zed", lambda: zed_theme.main(themes, minify=minify)),
+        Job("ghostty", lambda: ghostty.main(themes)),
+        Job("fish", lambda: fish_theme.main(themes, colors=colors)),
+        Job("sublime", lambda: sublime.main(themes)),
+        Job("tmux", lambda: tmux.main(themes, colors=colors)),
+        Job("zellij", lambda: zellij.main(themes)),
+    ]
+    if package:
+        jobs.append(
+            Job(
+                "vscode.package",
+                lambda: vscode.package_extension(themes, VSCODE_OUT_DIR),
+                depends_on=("vscode",),
+            )
+        )
+    return jobs
+
+
+def select_jobs(jobs: Iterable[Job], targets: Iterable[str]) -> List[Job]:
+    """Keep the jobs belonging to ``targets`` plus everything they depend on."""
+
+    by_name = {job.name: job for job in jobs}
+    wanted = set(targets)
+    unknown = wanted - {job.target for job in by_name.values()}
+    if unknown:
+        raise ValueError(f"Unknown build target(s): {', '.join(sorted(unknown))}")
+
+    selected: Dict[str, Job] = {}
+    pending = [job for job in by_name.values() if job.target in wanted]
+    while pending:
+        job = pending.pop()
+        if job.name in selected:
+            continue
+        selected[job.name] = job
+        pending.extend(by_name[dep] for dep in job.depends_on)
+    return [job for job in by_name.values() if job.name in selected]
+
+
+class JobOutput(io.TextIOBase):
+    """Stand-in for ``sys.stdout`` that buffers what each job thread prints.
+
+    Generators report ``wrote <path>`` with print; buffering per thread and
+    flushing from the scheduling thread keeps concurrent jobs' lines whole.
+    """
+
+    def __init__(self, stream: io.TextIOBase) -> None:
+        self.stream = stream
+        self._local = threading.local()
+
+    def start(self) -> None:
+        self._local.buffer = io.StringIO()
+
+    def finish(self) -> str:
+        text = self._local.buffer.getvalue()
+        self._local.buffer = None
+        return text
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def run_jobs(jobs: Sequence[Job], max_workers: Optional[int] = None) -> Dict[str, float]:
+    """Run ``jobs`` respecting their dependencies and return per-job wall times.
+
+    Output printed by a job is written out in one piece when the job ends.
+    """
+
+    by_name = {job.name: job for job in jobs}
+    for job in jobs:
+        missing = [dep for dep in job.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Job '{job.name}' depends on unknown job(s): {missing}")
+
+    durations: Dict[str, float] = {}
+    done: set = set()
+    waiting = dict(by_name)
+    stdout = sys.stdout
+    job_output = JobOutput(stdout)
+
+    def timed(job: Job) -> Tuple[float, str]:
+        job_output.start()
+        start = time.perf_counter()
+        try:
+            job.run()
+        except BaseException:
+            stdout.write(job_output.finish())
+            raise
+        return time.perf_counter() - start, job_output.finish()
+
+    sys.stdout = job_output
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running: Dict[Future, str] = {}
+            while waiting or running:
+                ready = [
+                    job
+                    for job in waiting.values()
+                    if all(dep in done for dep in job.depends_on)
+                ]
+                for job in ready:
+                    del waiting[job.name]
+                    running[pool.submit(timed, job)] = job.name
+                if not running:
+                    raise ValueError(f"Dependency cycle between jobs: {sorted(waiting)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    durations[name], text = future.result()
+                    stdout.write(text)
+                    done.add(name)
+    finally:
+        sys.stdout = stdout
+    return durations
+
+
+def cache_keys(
+    targets: Iterable[str],
+    themes: Sequence[ThemeDefinition],
+    package: bool,
+    minify: bool = False,
+    colors: str = "truecolor",
+    snap: Optional[float] = None,
+) -> Dict[str, str]:
+    """Return the build cache key of every target in ``targets``."""
+
+    keys: Dict[str, str] = {}
+    for target in targets:
+        extra: Tuple[str, ...] = ()
+        if target == "vscode" and package:
+            extra = ("package",)
+        elif target == "zed" and minify:
+            extra = ("minify",)
+        elif target in ("fish", "tmux") and colors != "truecolor":
+            extra = (f"colors={colors}",)
+        if snap is not None:
+            extra += (f"snap={snap:g}",)
+        keys[target] = build_cache.target_key(TARGET_MODULES[target], themes, extra)
+    return keys
+
+
+def skip_fresh_targets(
+    jobs: Sequence[Job], manifest: build_cache.BuildManifest, keys: Dict[str, str]
+) -> List[Job]:
+    """Drop the jobs of targets whose cache key matches the manifest."""
+
+    stale = {target for target, key in keys.items() if not manifest.is_fresh(target, key)}
+    return [job for job in jobs if job.target in stale]
+
+
+def time_serial_scripts(targets: Iterable[str]) -> float:
+    """Time the Makefile-style build: one interpreter per generator, in order."""
+
+    wanted = set(targets)
+    start = time.perf_counter()
+    for target, script in SERIAL_SCRIPTS.items():
+        if target not in wanted:
+            continue
+        result = subprocess.run(
+            [sys.executable, script], capture_output=True, text=True, check=False
+        )
+        if result.returncode != 0:
+            print(result.stdout.strip())
+            print(result.stderr.strip())
+            raise SystemExit(result.returncode)
+    return time.perf_counter() - start
+
+
+def build(
+    targets: Optional[Iterable[str]] = None,
+    themes: Optional[Sequence[ThemeDefinition]] = None,
+    package: bool = True,
+    force: bool = False,
+    max_workers: Optional[int] = None,
+    minify: bool = False,
+    colors: str = "truecolor",
+    snap: Optional[float] = None,
+) -> Tuple[Dict[str, float], build_cache.BuildManifest]:
+    """Build the stale jobs of ``targets`` (default: all) and update the manifest.
+
+    Returns the per-job wall times and the manifest holding this run's cache
+    hits and misses. Output write counters are reset, so ``output.format_stats``
+    describes this run afterwards. With ``snap`` set, derived colours within
+    that ΔE of a palette swatch are snapped to it (see ``palette_snap``).
+    """
+
+    if snap is not None:
+        palette_snap.enable(snap)
+    elif palette_snap.ENABLED:
+        palette_snap.disable()
+    if themes is None:
+        themes = default_themes()
+    jobs = default_jobs(themes, package=package, minify=minify, colors=colors)
+    if targets:
+        jobs = select_jobs(jobs, targets)
+
+    manifest = build_cache.BuildManifest.load()
+    keys = cache_keys(
+        dict.fromkeys(job.target for job in jobs), themes, package, minify, colors, snap
+    )
+    if force:
+        manifest.misses.extend(keys)
+        stale_jobs = list(jobs)
+    else:
+        stale_jobs = skip_fresh_targets(jobs, manifest, keys)
+
+    # Keep the parsed-palette snapshot current for the next generator import.
+    palette_store.write_snapshot()
+    output.reset_stats()
+    durations = run_jobs(stale_jobs, max_workers=max_workers)
+    for target in dict.fromkeys(job.target for job in stale_jobs):
+        manifest.record(target, keys[target], build_cache.outputs_under(BUILD_DIR / target))
+    manifest.save()
+    return durations, manifest
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="targets to build (default: all of them)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="worker threads (default: one per ready job, capped by the executor)",
+    )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="run the job graph on a single worker",
+    )
+    parser.add_argument(
+        "--no-package",
+        action="store_true",
+        help="skip packaging the VSCode extension",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="write the Zed theme bundle without insignificant whitespace",
+    )
+    parser.add_argument(
+        "--colors",
+        choices=COLOR_MODES,
+        default="truecolor",
+        help="write the tmux and fish themes for 256- or 16-colour terminals",
+    )
+    parser.add_argument(
+        "--snap",
+        type=float,
+        nargs="?",
+        const=palette_snap.SNAP_TOLERANCE,
+        default=None,
+        metavar="TOLERANCE",
+        help="snap derived colours within this ΔE OK of an FT swatch to it "
+        f"(default tolerance: {palette_snap.SNAP_TOLERANCE})",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="rebuild targets even when the build cache says they are fresh",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="print hit/miss/eviction counters of the colour math caches",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help=f"write per-stage timings and colour-op counters to {instrument.REPORT_PATH}",
+    )
+    parser.add_argument(
+        "--compare-serial",
+        action="store_true",
+        help="also time the per-script serial build the Makefile used to run",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Build the requested targets and report wall time."""
+
+    args = parse_args(argv)
+    if args.instrument:
+        instrument.enable(report_at_exit=False)
+        instrument.reset()
+    start = time.perf_counter()
+    durations, manifest = build(
+        args.targets,
+        package=not args.no_package,
+        force=args.force,
+        max_workers=1 if args.serial else args.jobs,
+        minify=args.minify,
+        colors=args.colors,
+        snap=args.snap,
+    )
+    total = time.perf_counter() - start
+
+    for name, seconds in sorted(durations.items(), key=lambda item: -item[1]):
+        print(f"{name:<16} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<16} {total * 1000:8.1f} ms")
+    print(manifest.summary())
+    print(output.format_stats())
+    # Snaps are only recorded by targets that actually ran.
+    if palette_snap.ENABLED and manifest.misses:
+        print(palette_snap.format_report())
+        if manifest.hits:
+            print(f"snap: cached targets not re-checked: {', '.join(manifest.hits)}")
+    if args.cache_stats:
+        print(color_cache.format_stats())
+    if instrument.ENABLED:
+        print(f"wrote {instrument.write_report()}")
+
+    if args.compare_serial:
+        serial = time_serial_scripts(args.targets or TARGET_MODULES)
+        print(f"{'serial scripts':<16} {serial * 1000:8.1f} ms")
+        if total > 0:
+            print(f"speedup: {serial / total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Content-hash build manifest used to skip targets whose inputs are unchanged."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+from ft_palette import FT_COLOR_PALETTE, ThemeDefinition
+
+SOURCE_ROOT = Path(__file__).resolve().parent
+MANIFEST_PATH = Path("build/.manifest.json")
+MANIFEST_VERSION = 2
+
+# Absolute imports at the start of a line; a regex keeps rescans cheap in
+# watch mode, where parsing the palette module would dominate.
+_IMPORT_PATTERN = re.compile(
+    r"^[ \t]*(?:from[ \t]+(\w+)[ \t]+import\b|import[ \t]+([\w, \t]+?)[ \t]*$)",
+    re.MULTILINE,
+)
+
+
+def palette_fingerprint(themes: Iterable[ThemeDefinition]) -> str:
+    """Hash the palette entries and theme definitions that feed the generators."""
+
+    digest = hashlib.sha256()
+    for color in FT_COLOR_PALETTE:
+        digest.update(f"{color.name}\0{color.css_variable}\0{color.hex_value}\n".encode())
+    for theme in themes:
+        digest.update(repr(theme).encode())
+    return digest.hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """Hash a file's contents, or return "" if it is missing."""
+
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+def local_imports(path: Path) -> List[str]:
+    """Return the names of repository modules imported by the file at ``path``."""
+
+    return list(_local_imports(path, path.stat().st_mtime_ns))
+
+
+@lru_cache(maxsize=None)
+def _local_imports(path: Path, mtime_ns: int) -> tuple:
+    names: List[str] = []
+    for match in _IMPORT_PATTERN.finditer(path.read_text()):
+        if match.group(1):
+            names.append(match.group(1))
+        else:
+            names.extend(name.split(" as ")[0].strip() for name in match.group(2).split(","))
+    return tuple(
+        name for name in dict.fromkeys(names) if (SOURCE_ROOT / f"{name}.py").is_file()
+    )
+
+
+def source_files(module: str) -> List[Path]:
+    """Return ``module``'s source file plus every local module it imports."""
+
+    seen: Dict[str, Path] = {}
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        path = SOURCE_ROOT / f"{name}.py"
+        seen[name] = path
+        pending.extend(local_imports(path))
+    return [seen[name] for name in sorted(seen)]
+
+
+def target_key(
+    module: str, themes: Iterable[ThemeDefinition], extra: Sequence[str] = ()
+) -> str:
+    """Hash everything a target's output depends on."""
+
+    digest = hashlib.sha256(palette_fingerprint(themes).encode())
+    for path in source_files(module):
+        digest.update(path.name.encode() + b"\0")
+        digest.update(path.read_bytes())
+    for item in extra:
+        digest.update(b"\0" + item.encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class BuildManifest:
+    """Per-target input hashes and output digests recorded by the last successful build."""
+
+    path: Path = MANIFEST_PATH
+    targets: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    totals: Dict[str, int] = field(default_factory=lambda: {"hits": 0, "misses": 0})
+    hits: List[str] = field(default_factory=list)
+    misses: List[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST_PATH) -> "BuildManifest":
+        """Read the manifest at ``path``, starting empty if it is missing or stale."""
+
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return cls(path=path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path=path)
+        return cls(
+            path=path,
+            targets=data.get("targets", {}),
+            totals={"hits": 0, "misses": 0, **data.get("totals", {})},
+        )
+
+    def is_fresh(self, target: str, key: str) -> bool:
+        """Return True, and count a hit, when ``target`` can be skipped.
+
+        The inputs must hash to ``key`` and every recorded output must still
+        hold the bytes the build wrote, so an output overwritten by a direct
+        generator run (e.g. ``zed_theme.py --minify``) is rebuilt.
+        """
+
+        entry = self.targets.get(target)
+        fresh = (
+            entry is not None
+            and entry.get("key") == key
+            and all(
+                file_digest(Path(output)) == digest
+                for output, digest in entry.get("outputs", {}).items()
+            )
+        )
+        if fresh:
+            self.hits.append(target)
+        else:
+            self.misses.append(target)
+        return fresh
+
+    def record(self, target: str, key: str, outputs: Iterable[Path]) -> None:
+        """Remember the inputs and outputs of a freshly built target."""
+
+        self.targets[target] = {
+            "key": key,
+            "outputs": {str(output): file_digest(output) for output in sorted(outputs)},
+        }
+
+    def save(self) -> None:
+        """Write the manifest, folding this run's hits and misses into the totals."""
+
+        self.totals["hits"] += len(self.hits)
+        self.totals["misses"] += len(self.misses)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MANIFEST_VERSION,
+            "targets": self.targets,
+            "totals": self.totals,
+        }
+        self.path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+
+    def summary(self) -> str:
+        """Describe this run's cache hits and misses plus the totals saved so far."""
+
+        runs = self.totals["hits"] + self.totals["misses"]
+        hits = self.totals["hits"]
+        rate = hits / runs * 100 if runs else 0.0
+        skipped = ", ".join(self.hits) if self.hits else "none"
+        return (
+            f"cache: {len(self.hits)} hit(s), {len(self.misses)} miss(es)"
+            f" (skipped: {skipped}); lifetime hit rate {rate:.0f}% of {runs}"
+        )
+
+
+def outputs_under(out_dir: Path) -> List[Path]:
+    """List the files a target left in its output directory."""
+
+    if not out_dir.is_dir():
+        return []
+    return sorted(path for path in out_dir.iterdir() if path.is_file())
+
@@ -0,0 +1,125 @@
+"""Size-bounded memoization shared by the colour math helpers."""
+
+from __future__ import annotations
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, TypeVar
+
+DEFAULT_MAXSIZE = 4096
+
+F = TypeVar("F", bound=Callable[..., object])
+
+_MISSING = object()
+
+
+class BoundedCache:
+    """A thread-safe LRU mapping that counts hits, misses and evictions."""
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> object:
+        """Return the cached value for key, or the module's missing sentinel."""
+
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: object) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return the counters, current size and hit rate."""
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+CACHES: Dict[str, BoundedCache] = {}
+
+
+def memoize(name: str, maxsize: int = DEFAULT_MAXSIZE) -> Callable[[F], F]:
+    """Cache a function of hashable positional/keyword arguments in CACHES[name]."""
+
+    cache = CACHES.setdefault(name, BoundedCache(name, maxsize))
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            value = cache.get(key)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    """Return the statistics of every registered cache, keyed by name."""
+
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def clear_caches() -> None:
+    """Empty every registered cache and reset its counters."""
+
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def format_stats() -> str:
+    """Render cache_stats() as one line per cache."""
+
+    lines = []
+    for name, stats in cache_stats().items():
+        lines.append(
+            f"{name}: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+            f"{stats['evictions']} eviction(s), {stats['size']}/{stats['maxsize']} "
+            f"entries, {stats['hit_rate'] * 100:.0f}% hit rate"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,128 @@
+"""Nearest-colour queries over a fixed set of colours.
+
+A ``ColorIndex`` holds a k-d tree over the OKLab coordinates of its colours,
+so finding the perceptually closest entry to an arbitrary colour visits a
+handful of nodes instead of measuring against every entry. Distances are
+OKLab Euclidean (ΔE OK). The quantizers and palette snapping build one
+index per target set and reuse it for every lookup.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from color_space import Lab, oklab
+
+# (entry index, split axis, left subtree, right subtree)
+Node = Tuple[int, int, Optional["Node"], Optional["Node"]]
+
+
+class ColorIndex:
+    """k-d tree over the OKLab coordinates of a sequence of colours.
+
+    ``lightness_weight`` scales the L axis of the distance; values below 1
+    favour matching hue and chroma over lightness.
+    """
+
+    def __init__(self, colors: Sequence[str], lightness_weight: float = 1.0) -> None:
+        self.colors: Tuple[str, ...] = tuple(colors)
+        self.lightness_weight = lightness_weight
+        self.points: List[Lab] = [self._weigh(oklab(color)) for color in self.colors]
+        self._root = self._build(list(range(len(self.points))), 0)
+
+    def __len__(self) -> int:
+        return len(self.colors)
+
+    def _weigh(self, lab: Lab) -> Lab:
+        return (lab[0] * self.lightness_weight, lab[1], lab[2])
+
+    def _build(self, indices: List[int], axis: int) -> Optional[Node]:
+        if not indices:
+            return None
+        points = self.points
+        indices.sort(key=lambda i: (points[i][axis], i))
+        middle = len(indices) // 2
+        next_axis = (axis + 1) % 3
+        return (
+            indices[middle],
+            axis,
+            self._build(indices[:middle], next_axis),
+            self._build(indices[middle + 1 :], next_axis),
+        )
+
+    def nearest_lab(self, lab: Lab) -> Tuple[int, float]:
+        """Return (entry index, distance) of the entry closest to OKLab coordinates.
+
+        The distance is ΔE OK with the L axis weighted. Ties go to the lower
+        entry index.
+        """
+
+        if self._root is None:
+            raise ValueError("Cannot query an empty ColorIndex")
+        lab = self._weigh(lab)
+        points = self.points
+        best_index, best_distance = -1, math.inf
+        # (squared distance to the node's splitting plane, node)
+        stack: List[Tuple[float, Node]] = [(0.0, self._root)]
+        while stack:
+            bound, node = stack.pop()
+            if bound > best_distance:
+                continue
+            index, axis, left, right = node
+            point = points[index]
+            distance = (
+                (point[0] - lab[0]) ** 2 + (point[1] - lab[1]) ** 2 + (point[2] - lab[2]) ** 2
+            )
+            if distance < best_distance or (distance == best_distance and index < best_index):
+                best_index, best_distance = index, distance
+            offset = lab[axis] - point[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            # Push the far side first so the near side is searched first.
+            if far is not None and offset * offset <= best_distance:
+                stack.append((offset * offset, far))
+            if near is not None:
+                stack.append((bound, near))
+        return best_index, math.sqrt(best_distance)
+
+    def nearest(self, color: str) -> Tuple[int, float]:
+        """Return (entry index, distance) of the entry closest to a hex colour."""
+
+        return self.nearest_lab(oklab(color))
+
+    def nearest_matching(
+        self, color: str, accept: Callable[[int], bool]
+    ) -> Optional[Tuple[int, float]]:
+        """Return the closest entry to a hex colour that ``accept`` allows, or None.
+
+        Entries are visited nearest first (best-first over the tree), so the
+        search stops at the first accepted entry instead of testing them all.
+        """
+
+        lab = self._weigh(oklab(color))
+        points = self.points
+        # (squared distance or bound, 0 for a subtree / 1 for an entry, entry
+        # index, subtree); subtrees sort first so equal distances tie by index.
+        heap: List[Tuple[float, int, int, Optional[Node]]] = []
+        if self._root is not None:
+            heap.append((0.0, 0, self._root[0], self._root))
+        while heap:
+            key, _, index, node = heapq.heappop(heap)
+            if node is None:
+                if accept(index):
+                    return index, math.sqrt(key)
+                continue
+            _, axis, left, right = node
+            point = points[index]
+            distance = (
+                (point[0] - lab[0]) ** 2 + (point[1] - lab[1]) ** 2 + (point[2] - lab[2]) ** 2
+            )
+            heapq.heappush(heap, (distance, 1, index, None))
+            offset = lab[axis] - point[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            if near is not None:
+                heapq.heappush(heap, (key, 0, near[0], near))
+            if far is not None:
+                heapq.heappush(heap, (max(key, offset * offset), 0, far[0], far))
+        return None
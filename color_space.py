@@ -0,0 +1,206 @@
+"""Batch colour-space conversions and perceptual mixing in OKLab/OKLCH.
+
+``ghostty.mix_colors`` interpolates gamma-encoded sRGB, which muddies hues
+and makes equal mix amounts look uneven across light and dark backgrounds.
+The functions here convert whole lists of colours between hex, linear sRGB,
+OKLab and OKLCH and mix, lighten or darken them in OKLab, where equal steps
+look equal. Each batch operation takes sequences (scalars are broadcast), so
+a generator derives every surface or dim colour of a theme in one call.
+
+Hex colours are decoded through ``palette_store`` (palette entries are
+already linearized) and each colour's OKLab coordinates are memoized.
+Results outside the sRGB gamut are clipped in linear light.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from color_cache import memoize
+from palette_store import color_record
+
+Lab = Tuple[float, float, float]
+Lch = Tuple[float, float, float]
+
+T = TypeVar("T")
+
+
+def _cbrt(value: float) -> float:
+    return math.copysign(abs(value) ** (1 / 3), value)
+
+
+def linear_to_srgb(channel: float) -> float:
+    """Encode a linear-light channel in 0..1 as gamma-encoded sRGB."""
+
+    if channel <= 0.0031308:
+        return channel * 12.92
+    return 1.055 * math.pow(channel, 1 / 2.4) - 0.055
+
+
+def linear_to_oklab(red: float, green: float, blue: float) -> Lab:
+    """Convert linear sRGB channels to OKLab (L in 0..1)."""
+
+    l = _cbrt(0.4122214708 * red + 0.5363325363 * green + 0.0514459929 * blue)
+    m = _cbrt(0.2119034982 * red + 0.6806995451 * green + 0.1073969566 * blue)
+    s = _cbrt(0.0883024619 * red + 0.2817188376 * green + 0.6299787005 * blue)
+    return (
+        0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+        1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+        0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s,
+    )
+
+
+def oklab_to_linear(lightness: float, a: float, b: float) -> Tuple[float, float, float]:
+    """Convert OKLab to linear sRGB channels (possibly outside 0..1)."""
+
+    l = lightness + 0.3963377774 * a + 0.2158037573 * b
+    m = lightness - 0.1055613458 * a - 0.0638541728 * b
+    s = lightness - 0.0894841775 * a - 1.2914855480 * b
+    l, m, s = l * l * l, m * m * m, s * s * s
+    return (
+        4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+        -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+        -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s,
+    )
+
+
+def oklab_to_oklch(lab: Lab) -> Lch:
+    """Convert OKLab to OKLCH (hue in degrees, 0..360)."""
+
+    lightness, a, b = lab
+    return lightness, math.hypot(a, b), math.degrees(math.atan2(b, a)) % 360.0
+
+
+def oklch_to_oklab(lch: Lch) -> Lab:
+    """Convert OKLCH back to OKLab."""
+
+    lightness, chroma, hue = lch
+    radians = math.radians(hue)
+    return lightness, chroma * math.cos(radians), chroma * math.sin(radians)
+
+
+@memoize("oklab")
+def oklab(color: str) -> Lab:
+    """Return the OKLab coordinates of a hex (or rgba) colour; alpha is ignored."""
+
+    return linear_to_oklab(*color_record(color).linear)
+
+
+def oklab_hex(lab: Lab) -> str:
+    """Encode OKLab coordinates as ``#rrggbb``, clipping to the sRGB gamut."""
+
+    channels = []
+    for channel in oklab_to_linear(*lab):
+        channel = 0.0 if channel < 0.0 else 1.0 if channel > 1.0 else channel
+        channels.append(round(linear_to_srgb(channel) * 255))
+    return "#{:02x}{:02x}{:02x}".format(*channels)
+
+
+def to_oklab(colors: Iterable[str]) -> List[Lab]:
+    """Convert hex colours to OKLab."""
+
+    return [oklab(color) for color in colors]
+
+
+def from_oklab(labs: Iterable[Lab]) -> List[str]:
+    """Convert OKLab coordinates to hex colours."""
+
+    return [oklab_hex(lab) for lab in labs]
+
+
+def to_oklch(colors: Iterable[str]) -> List[Lch]:
+    """Convert hex colours to OKLCH."""
+
+    return [oklab_to_oklch(oklab(color)) for color in colors]
+
+
+def from_oklch(lchs: Iterable[Lch]) -> List[str]:
+    """Convert OKLCH coordinates to hex colours."""
+
+    return [oklab_hex(oklch_to_oklab(lch)) for lch in lchs]
+
+
+def broadcast(*columns: Union[T, Iterable[T]]) -> List[Sequence[T]]:
+    """Repeat scalar arguments to the length of the batch arguments.
+
+    Strings and non-iterables are scalars. Any other sequence (list, tuple,
+    range, array, ...) is a batch column as is; other iterables (generators,
+    ``dict.values()``, ...) are read into a list first.
+    """
+
+    batches: List[Optional[Sequence[T]]] = []
+    for column in columns:
+        if isinstance(column, (str, bytes)) or not isinstance(column, collections.abc.Iterable):
+            batches.append(None)
+        elif isinstance(column, collections.abc.Sequence):
+            batches.append(column)
+        else:
+            batches.append(list(column))
+    lengths = {len(batch) for batch in batches if batch is not None}
+    if len(lengths) > 1:
+        raise ValueError(f"Batch arguments differ in length: {sorted(lengths)}")
+    size = lengths.pop() if lengths else 1
+    return [
+        batch if batch is not None else (column,) * size
+        for column, batch in zip(columns, batches)
+    ]
+
+
+def mix(
+    colors: Union[str, Sequence[str]],
+    targets: Union[str, Sequence[str]],
+    amounts: Union[float, Sequence[float]],
+) -> List[str]:
+    """Mix each colour toward its target by its amount (0 = colour, 1 = target) in OKLab.
+
+    Any argument may be a single value, which is used for every colour.
+    """
+
+    colors, targets, amounts = broadcast(colors, targets, amounts)
+    mixed = []
+    for color, target, amount in zip(colors, targets, amounts):
+        l1, a1, b1 = oklab(color)
+        l2, a2, b2 = oklab(target)
+        mixed.append(
+            oklab_hex(
+                (l1 + (l2 - l1) * amount, a1 + (a2 - a1) * amount, b1 + (b2 - b1) * amount)
+            )
+        )
+    return mixed
+
+
+def lighten(
+    colors: Union[str, Sequence[str]], amounts: Union[float, Sequence[float]]
+) -> List[str]:
+    """Move each colour's OKLab lightness toward white by a fraction, keeping its hue."""
+
+    colors, amounts = broadcast(colors, amounts)
+    lightened = []
+    for color, amount in zip(colors, amounts):
+        lightness, a, b = oklab(color)
+        lightened.append(oklab_hex((lightness + (1.0 - lightness) * amount, a, b)))
+    return lightened
+
+
+def darken(
+    colors: Union[str, Sequence[str]], amounts: Union[float, Sequence[float]]
+) -> List[str]:
+    """Move each colour's OKLab lightness toward black by a fraction, keeping its hue."""
+
+    colors, amounts = broadcast(colors, amounts)
+    darkened = []
+    for color, amount in zip(colors, amounts):
+        lightness, a, b = oklab(color)
+        darkened.append(oklab_hex((lightness * (1.0 - amount), a, b)))
+    return darkened
+
+
+def delta_e(
+    colors: Union[str, Sequence[str]], others: Union[str, Sequence[str]]
+) -> List[float]:
+    """Return the OKLab distance (ΔE OK) between each pair of colours."""
+
+    colors, others = broadcast(colors, others)
+    return [math.dist(oklab(color), oklab(other)) for color, other in zip(colors, others)]
@@ -0,0 +1,78 @@
+"""Flatten translucent colours onto the theme background.
+
+Palette entries may carry alpha (``error-background`` is
+``rgba(204, 0, 0, 0.06)``), but tmux, Ghostty, Zellij, fish and Sublime
+Text's scalar settings take opaque colours only, and ``color_record``
+ignores alpha. Here every CSS colour form ``palette_store`` parses
+(``#rgb[a]``, ``#rrggbb[aa]``, ``rgb[a](...)``) is composited over an opaque
+background with the source-over rule in gamma-encoded sRGB, as browsers and
+Zed draw it, and encoded as ``#rrggbb``.
+
+``flatten`` takes whole lists (scalars are broadcast) so a generator
+flattens a theme's colours in one call. Opaque colours pass through
+unchanged and each (colour, background) pair is memoized, which keeps the
+variant pipeline cheap.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Sequence, Union
+
+from color_cache import memoize
+from color_space import broadcast
+from ft_palette import ThemeDefinition, get_color
+from palette_store import color_record
+
+
+@memoize("flatten")
+def flatten_color(color: str, background: str) -> str:
+    """Composite one colour over an opaque background and return ``#rrggbb``.
+
+    Opaque hex colours are returned as given.
+    """
+
+    source = color_record(color)
+    if source.alpha >= 1.0:
+        return color if color.startswith("#") and len(color) == 7 else source.hex
+    backdrop = color_record(background)
+    if backdrop.alpha < 1.0:
+        raise ValueError(f"Cannot flatten '{color}' onto translucent background '{background}'")
+    alpha = source.alpha
+    channels = (
+        round(front * alpha + back * (1.0 - alpha))
+        for front, back in zip(source.rgb, backdrop.rgb)
+    )
+    return "#{:02x}{:02x}{:02x}".format(*channels)
+
+
+def flatten(
+    colors: Union[str, Sequence[str]], backgrounds: Union[str, Sequence[str]]
+) -> List[str]:
+    """Flatten each colour over its background.
+
+    Either argument may be a single value, which is used for every colour.
+    """
+
+    colors, backgrounds = broadcast(colors, backgrounds)
+    return [flatten_color(color, background) for color, background in zip(colors, backgrounds)]
+
+
+def palette_colors(names: Iterable[str], background: str) -> List[str]:
+    """Return palette entries by name, flattened over a background."""
+
+    return flatten([get_color(name).hex_value for name in names], background)
+
+
+def theme_colors(theme: ThemeDefinition) -> List[str]:
+    """Return the theme's background, body, comment and selection colours, opaque."""
+
+    background = theme.background.hex_value
+    return flatten(
+        [
+            background,
+            theme.body_text.hex_value,
+            theme.comment_text.hex_value,
+            theme.selection.hex_value,
+        ],
+        background,
+    )
@@ -0,0 +1,130 @@
+"""Palette-wide WCAG contrast matrix for accessibility sweeps.
+
+Every palette entry's relative luminance is computed once from the
+pre-linearized channels in ``palette_store``; the N x N ratio table is then
+filled row by row and cached, so sweeps such as "everything with 4.5:1
+against paper" are table lookups instead of thousands of scalar
+``ghostty.contrast_ratio`` calls.
+"""
+
+from __future__ import annotations
+
+import argparse
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from palette_store import PALETTE_STORE, PaletteStore
+
+WCAG_AA_NORMAL = 4.5
+
+
+class ContrastMatrix:
+    """Symmetric table of contrast ratios between every pair of palette entries."""
+
+    def __init__(self, store: PaletteStore) -> None:
+        self.store = store
+        self.names = store.names
+        linear = store.linear
+        self.luminance = array(
+            "d",
+            (
+                0.2126 * linear[i] + 0.7152 * linear[i + 1] + 0.0722 * linear[i + 2]
+                for i in range(0, len(linear), 3)
+            ),
+        )
+        offset = [lum + 0.05 for lum in self.luminance]
+        self.rows: List[array] = [
+            array("d", (max(a, b) / min(a, b) for b in offset)) for a in offset
+        ]
+
+    def _index(self, name: str) -> int:
+        try:
+            return self.store.index[name]
+        except KeyError as exc:
+            raise ValueError(f"Unknown FT color '{name}'") from exc
+
+    def ratio(self, color_a: str, color_b: str) -> float:
+        """Return the contrast ratio between two palette entries."""
+
+        return self.rows[self._index(color_a)][self._index(color_b)]
+
+    def meeting(
+        self,
+        against: str,
+        min_ratio: float = WCAG_AA_NORMAL,
+        candidates: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return (name, ratio) for entries reaching min_ratio against a colour.
+
+        Results are ordered from highest to lowest contrast.
+        """
+
+        row = self.rows[self._index(against)]
+        names = self.names if candidates is None else tuple(candidates)
+        ratios = ((name, row[self._index(name)]) for name in names)
+        hits = [(name, ratio) for name, ratio in ratios if ratio >= min_ratio]
+        return sorted(hits, key=lambda item: -item[1])
+
+    def best_foreground(
+        self, background: str, candidates: Optional[Iterable[str]] = None
+    ) -> Tuple[str, float]:
+        """Return the entry with the highest contrast against a background."""
+
+        row = self.rows[self._index(background)]
+        names = self.names if candidates is None else tuple(candidates)
+        best = max(names, key=lambda name: row[self._index(name)])
+        return best, row[self._index(best)]
+
+    def pairs_meeting(self, min_ratio: float = WCAG_AA_NORMAL) -> List[Tuple[str, str, float]]:
+        """Return every unordered pair of entries that reaches min_ratio."""
+
+        pairs = []
+        for i, row in enumerate(self.rows):
+            for j in range(i + 1, len(row)):
+                if row[j] >= min_ratio:
+                    pairs.append((self.names[i], self.names[j], row[j]))
+        return pairs
+
+
+_MATRIX: Optional[ContrastMatrix] = None
+
+
+def contrast_matrix(store: PaletteStore | None = None) -> ContrastMatrix:
+    """Return the cached matrix for the palette store, building it on first use."""
+
+    global _MATRIX
+    store = PALETTE_STORE if store is None else store
+    if _MATRIX is None or _MATRIX.store is not store:
+        _MATRIX = ContrastMatrix(store)
+    return _MATRIX
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Print palette entries that meet a ratio against, or best suit, a colour."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("color", help="palette entry to test against, e.g. paper")
+    parser.add_argument(
+        "--min-ratio",
+        type=float,
+        default=WCAG_AA_NORMAL,
+        help="minimum contrast ratio (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--best",
+        action="store_true",
+        help="only print the best-contrast foreground",
+    )
+    args = parser.parse_args(argv)
+
+    matrix = contrast_matrix()
+    if args.best:
+        name, ratio = matrix.best_foreground(args.color)
+        print(f"{name} {ratio:.2f}")
+        return
+    for name, ratio in matrix.meeting(args.color, args.min_ratio):
+        print(f"{name:<28} {ratio:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
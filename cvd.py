@@ -0,0 +1,188 @@
+"""Colour-vision-deficiency (CVD) simulation for terminal palettes.
+
+Each colour is projected through the Machado et al. (2009) full-severity
+matrices for protanopia, deuteranopia and tritanopia (in linear sRGB) and
+compared in OKLab. A ``PairTable`` simulates a palette once and measures all of its pairs
+(120 for the 16 ANSI colours); ``failing_pairs`` lists the pairs that read
+as distinct with normal vision but collapse under some deficiency.
+``ghostty.ansi_palette`` uses it to decide which ANSI colours to separate,
+scoring candidate colours for one slot against the table without
+re-simulating the rest.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from color_cache import memoize
+from color_space import Lab, linear_to_oklab, oklab
+from palette_store import color_record
+
+Matrix = Tuple[Tuple[float, float, float], ...]
+
+# Machado, Oliveira & Fernandes (2009), severity 1.0, applied to linear sRGB.
+CVD_MATRICES: Dict[str, Matrix] = {
+    "protan": (
+        (0.152286, 1.052583, -0.204868),
+        (0.114503, 0.786281, 0.099216),
+        (-0.003882, -0.048116, 1.051998),
+    ),
+    "deutan": (
+        (0.367322, 0.860646, -0.227968),
+        (0.280085, 0.672501, 0.047413),
+        (-0.011820, 0.042940, 0.968881),
+    ),
+    "tritan": (
+        (1.255528, -0.076749, -0.178779),
+        (-0.078411, 0.930809, 0.147602),
+        (0.004733, 0.691367, 0.303900),
+    ),
+}
+CVD_KINDS: Tuple[str, ...] = tuple(CVD_MATRICES)
+
+# A pair fails when some deficiency brings it closer than MIN_CVD_DELTA_E
+# (OKLab distance) although it is at least DISTINCT_DELTA_E apart with
+# normal vision; pairs that are meant to look alike are left alone.
+MIN_CVD_DELTA_E = 0.03
+DISTINCT_DELTA_E = 0.06
+
+
+class PairDistance(NamedTuple):
+    """How far apart two palette slots are, normally and under the worst deficiency."""
+
+    first: int
+    second: int
+    normal: float
+    worst: float
+    kind: str
+
+    def fails(self, min_delta_e: float = MIN_CVD_DELTA_E) -> bool:
+        return self.normal >= DISTINCT_DELTA_E and self.worst < min_delta_e
+
+
+@memoize("cvd_simulate")
+def simulate(color: str) -> Tuple[Lab, ...]:
+    """Return a colour's OKLab coordinates with normal vision, then each of CVD_KINDS."""
+
+    red, green, blue = color_record(color).linear
+    seen = [oklab(color)]
+    for matrix in CVD_MATRICES.values():
+        channels = [
+            min(1.0, max(0.0, row[0] * red + row[1] * green + row[2] * blue))
+            for row in matrix
+        ]
+        seen.append(linear_to_oklab(*channels))
+    return tuple(seen)
+
+
+def _distance(first: int, second: int, a: Tuple[Lab, ...], b: Tuple[Lab, ...]) -> PairDistance:
+    dist = math.dist
+    distances = [dist(a[k], b[k]) for k in range(1, len(a))]
+    worst = min(range(len(distances)), key=distances.__getitem__)
+    return PairDistance(first, second, dist(a[0], b[0]), distances[worst], CVD_KINDS[worst])
+
+
+def _fails(a: Tuple[Lab, ...], b: Tuple[Lab, ...], min_delta_e: float) -> bool:
+    dist = math.dist
+    if dist(a[0], b[0]) < DISTINCT_DELTA_E:
+        return False
+    return any(dist(a[k], b[k]) < min_delta_e for k in range(1, len(a)))
+
+
+class PairTable:
+    """Normal and simulated coordinates of a palette, for measuring its pairs.
+
+    Every colour is simulated once when the table is built (or a slot is
+    replaced); ``failures_with`` scores a candidate colour for one slot
+    against the other slots without rebuilding the table.
+    """
+
+    def __init__(self, colors: Sequence[str], min_delta_e: float = MIN_CVD_DELTA_E) -> None:
+        self.colors = list(colors)
+        self.points = [simulate(color) for color in self.colors]
+        self.min_delta_e = min_delta_e
+
+    def __len__(self) -> int:
+        return len(self.colors)
+
+    def pairs(self) -> List[PairDistance]:
+        """Measure every unordered pair."""
+
+        points = self.points
+        return [
+            _distance(first, second, points[first], points[second])
+            for first, second in itertools.combinations(range(len(points)), 2)
+        ]
+
+    def failing(self) -> List[PairDistance]:
+        """Return the pairs that collapse under a deficiency, worst first."""
+
+        points, min_delta_e = self.points, self.min_delta_e
+        failures = [
+            _distance(first, second, points[first], points[second])
+            for first, second in itertools.combinations(range(len(points)), 2)
+            if _fails(points[first], points[second], min_delta_e)
+        ]
+        return sorted(failures, key=lambda pair: pair.worst)
+
+    def pair_with(self, index: int, other: int, color: str) -> PairDistance:
+        """Measure slot ``other`` against ``color`` placed in slot ``index``."""
+
+        return _distance(index, other, simulate(color), self.points[other])
+
+    def failures_with(self, index: int, color: Optional[str] = None) -> int:
+        """Count the failing pairs of one slot, optionally holding another colour."""
+
+        point = self.points[index] if color is None else simulate(color)
+        min_delta_e = self.min_delta_e
+        return sum(
+            _fails(point, other_point, min_delta_e)
+            for other, other_point in enumerate(self.points)
+            if other != index
+        )
+
+    def replace(self, index: int, color: str) -> None:
+        """Put a new colour in a slot."""
+
+        self.colors[index] = color
+        self.points[index] = simulate(color)
+
+
+def failing_pairs(
+    colors: Sequence[str], min_delta_e: float = MIN_CVD_DELTA_E
+) -> List[PairDistance]:
+    """Return the pairs of a palette that collapse under a deficiency, worst first."""
+
+    return PairTable(colors, min_delta_e).failing()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Print the failing ANSI pairs of the shipped themes."""
+
+    from ft_palette import INVERSE_THEME, STANDARD_THEME
+    from ghostty import ANSI_PALETTE_NAMES, ansi_palette
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--min-delta-e",
+        type=float,
+        default=MIN_CVD_DELTA_E,
+        help="minimum OKLab distance under simulation (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    for theme in (STANDARD_THEME, INVERSE_THEME):
+        failures = failing_pairs(ansi_palette(theme), args.min_delta_e)
+        print(f"{theme.slug}: {len(failures)} failing pair(s)")
+        for pair in failures:
+            print(
+                f"  {ANSI_PALETTE_NAMES[pair.first]} / {ANSI_PALETTE_NAMES[pair.second]}: "
+                f"{pair.worst:.3f} ({pair.kind}), {pair.normal:.3f} normally"
+            )
+
+
+if __name__ == "__main__":
+    main()
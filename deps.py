@@ -0,0 +1,448 @@
+"""Track which output keys depend on which palette entries and theme fields.
+
+Each generator's output is flattened into ``key -> value`` entries (Zed style
+keys, tmux options, Ghostty palette slots, ...). Dependencies are recorded by
+probing: every palette entry, and every ThemeDefinition field, is swapped for
+contrasting probe colours and the entries whose values move are recorded as
+depending on it. Probing works with the generators unchanged, including
+through ensure_contrast and mix. The resulting map is cached per source hash
+in ``build/.deps.json`` and answers "what changes if mandarin changes?"
+without rebuilding anything. Consumers narrow rebuilds to the targets an
+edit reaches; they do not patch individual keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import build_cache
+import fish_theme
+import ft_palette
+import ghostty
+import sublime
+import tmux
+import vscode
+import zed_theme
+import zellij
+from color_cache import CACHES, clear_caches
+from ft_palette import ThemeDefinition
+from palette_store import color_record
+
+DEPS_PATH = Path("build/.deps.json")
+THEME_FIELDS = ("background", "body_text", "comment_text", "selection")
+
+# Outputs are flattened to {"<theme slug>:<key>": value}.
+Flattened = Dict[str, str]
+
+
+def flatten_value(prefix: str, value: object, out: Flattened) -> None:
+    """Flatten nested dicts and lists into dotted keys."""
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten_value(f"{prefix}.{key}" if prefix else str(key), item, out)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            flatten_value(f"{prefix}[{index}]", item, out)
+    else:
+        out[prefix] = json.dumps(value)
+
+
+def _flatten_payloads(build: Callable[[ThemeDefinition], object]) -> Callable:
+    def flatten(themes: Sequence[ThemeDefinition]) -> Flattened:
+        out: Flattened = {}
+        for theme in themes:
+            flat: Flattened = {}
+            flatten_value("", build(theme), flat)
+            out.update((f"{theme.slug}:{key}", value) for key, value in flat.items())
+        return out
+
+    return flatten
+
+
+def _flatten_lines(
+    build: Callable[[ThemeDefinition], List[str]], key_of: Callable[[str], str]
+) -> Callable:
+    def flatten(themes: Sequence[ThemeDefinition]) -> Flattened:
+        out: Flattened = {}
+        for theme in themes:
+            for number, line in enumerate(build(theme)):
+                key = key_of(line) or f"line {number + 1}"
+                out[f"{theme.slug}:{key}"] = line
+        return out
+
+    return flatten
+
+
+def _ghostty_lines(theme: ThemeDefinition) -> List[str]:
+    return ghostty.build_theme_lines(theme, ghostty.build_palette_values(theme))
+
+
+def _ghostty_key(line: str) -> str:
+    key, _, value = line.partition(" = ")
+    if key == "palette":
+        return f"palette {value.split('=')[0]}"
+    return key if value else ""
+
+
+def _tmux_key(line: str) -> str:
+    parts = line.split()
+    return parts[2] if len(parts) > 2 and parts[0] == "set" else ""
+
+
+def _fish_key(line: str) -> str:
+    return line.split()[0] if line.startswith("fish_") else ""
+
+
+def _flatten_zellij(themes: Sequence[ThemeDefinition]) -> Flattened:
+    out: Flattened = {}
+    for theme in themes:
+        section = ""
+        for line in zellij.build_theme_lines(theme):
+            stripped = line.strip()
+            if stripped.endswith("{"):
+                section = stripped[:-1].strip()
+            elif stripped and stripped != "}":
+                key, _, value = stripped.partition(" ")
+                out[f"{theme.slug}:{section}.{key}"] = value
+    return out
+
+
+TARGET_FLATTENERS: Dict[str, Callable[[Sequence[ThemeDefinition]], Flattened]] = {
+    "vscode": _flatten_payloads(vscode.build_theme_payload),
+    "zed": _flatten_payloads(zed_theme.build_theme),
+    "ghostty": _flatten_lines(_ghostty_lines, _ghostty_key),
+    "fish": _flatten_lines(fish_theme.build_theme_lines, _fish_key),
+    "sublime": _flatten_payloads(sublime.build_color_scheme),
+    "tmux": _flatten_lines(tmux.build_theme_lines, _tmux_key),
+    "zellij": _flatten_zellij,
+}
+
+# Probe colours are chosen per entry: its RGB complement and a hue rotation,
+# so every use of the entry sees a large change whatever its contrast regime.
+
+# The ANSI palette is solved as a whole (contrast, then colour-vision
+# separation) and seeds the 256-colour cube, so a small edit to one slot, or
+# to anything else feeding the solve such as the body text, can move any
+# other slot. A source reaching one key downstream of a theme's solve is
+# recorded against all of them.
+
+
+def probe_values(value: str) -> List[str]:
+    """Return replacement colours that should disturb every use of ``value``."""
+
+    red, green, blue = color_record(value).rgb
+    return [
+        f"#{255 - red:02x}{255 - green:02x}{255 - blue:02x}",
+        f"#{blue:02x}{red:02x}{green:02x}"
+        if (red, green, blue) != (blue, red, green)
+        else f"#{(red + 128) % 256:02x}{green:02x}{blue:02x}",
+    ]
+
+
+@contextmanager
+def palette_override(name: str, hex_value: str) -> Iterator[None]:
+    """Temporarily replace a palette entry as seen by ``get_color``.
+
+    Per-theme caches such as the ANSI palette are keyed on the theme, not the
+    palette, so they are cleared on the way in and out.
+    """
+
+    by_name = ft_palette.FT_COLOR_BY_NAME
+    original = by_name[name]
+    by_name[name] = dataclasses.replace(original, hex_value=hex_value)
+    clear_caches()
+    try:
+        yield
+    finally:
+        by_name[name] = original
+        clear_caches()
+
+
+def _replace_color(theme: ThemeDefinition, name: str, hex_value: str) -> ThemeDefinition:
+    changes = {
+        field: dataclasses.replace(getattr(theme, field), hex_value=hex_value)
+        for field in THEME_FIELDS
+        if getattr(theme, field).name == name
+    }
+    return dataclasses.replace(theme, **changes) if changes else theme
+
+
+def changed_keys(before: Flattened, after: Flattened) -> Set[str]:
+    """Return the keys whose value differs (or that appear or disappear)."""
+
+    return {key for key in before.keys() | after.keys() if before.get(key) != after.get(key)}
+
+
+def ansi_solve_keys(
+    themes: Sequence[ThemeDefinition],
+    targets: Sequence[str],
+    baseline: Mapping[str, Flattened],
+) -> Dict[str, Set[Tuple[str, str]]]:
+    """Return ``{theme slug: {(target, key)}}`` downstream of each theme's ANSI solve.
+
+    Every slot of the theme's cached ANSI palette is replaced by a probe
+    colour and the keys that move are collected.
+    """
+
+    solved: Dict[str, Set[Tuple[str, str]]] = {}
+    for theme in themes:
+        clear_caches()
+        ansi = ghostty.ansi_palette(theme)
+        CACHES["ansi_palette"].put((theme,), tuple(probe_values(color)[0] for color in ansi))
+        solved[theme.slug] = {
+            (target, key)
+            for target in targets
+            for key in changed_keys(baseline[target], TARGET_FLATTENERS[target](themes))
+        }
+    clear_caches()
+    return solved
+
+
+def compute_dependency_map(
+    themes: Sequence[ThemeDefinition],
+    targets: Iterable[str] = tuple(TARGET_FLATTENERS),
+) -> Dict[str, Dict[str, List[str]]]:
+    """Probe every palette entry and theme field and record dependent keys.
+
+    Returns ``{source: {target: [keys]}}`` where a source is a palette entry
+    name or ``theme:<slug>.<field>``. A source reaching any key downstream
+    of a theme's ANSI solve also gets every other such key, since probing
+    one source at a time misses how the other slots are re-solved around it.
+    """
+
+    targets = tuple(targets)
+    baseline = {target: TARGET_FLATTENERS[target](themes) for target in targets}
+    dependencies: Dict[str, Dict[str, List[str]]] = {}
+
+    def probe(source: str, run: Callable[[str], Dict[str, Flattened]], values: List[str]) -> None:
+        hits: Dict[str, Set[str]] = {}
+        for value in values:
+            for target, flat in run(value).items():
+                keys = changed_keys(baseline[target], flat)
+                if keys:
+                    hits.setdefault(target, set()).update(keys)
+        if hits:
+            dependencies[source] = {target: sorted(keys) for target, keys in hits.items()}
+
+    for color in ft_palette.FT_COLOR_PALETTE:
+
+        def run_palette(value: str, name: str = color.name) -> Dict[str, Flattened]:
+            probed = [_replace_color(theme, name, value) for theme in themes]
+            with palette_override(name, value):
+                return {target: TARGET_FLATTENERS[target](probed) for target in targets}
+
+        probe(color.name, run_palette, probe_values(color.hex_value))
+
+    for index, theme in enumerate(themes):
+        for field in THEME_FIELDS:
+
+            def run_field(value: str, index: int = index, field: str = field) -> Dict[str, Flattened]:
+                probed = list(themes)
+                probed[index] = dataclasses.replace(
+                    themes[index],
+                    **{field: dataclasses.replace(getattr(themes[index], field), hex_value=value)},
+                )
+                return {target: TARGET_FLATTENERS[target](probed) for target in targets}
+
+            probe(
+                f"theme:{theme.slug}.{field}",
+                run_field,
+                probe_values(getattr(theme, field).hex_value),
+            )
+
+    for solve in ansi_solve_keys(themes, targets, baseline).values():
+        for source, own in dependencies.items():
+            reached = {(target, key) for target, keys in own.items() for key in keys}
+            if reached & solve:
+                for target, key in solve - reached:
+                    own.setdefault(target, []).append(key)
+                for keys in own.values():
+                    keys.sort()
+
+    clear_caches()
+    return dependencies
+
+
+def sources_key(themes: Sequence[ThemeDefinition]) -> str:
+    """Hash the palette, themes and generator sources the map was probed from."""
+
+    digest = hashlib.sha256()
+    for module in sorted(set(build_cache.source_files("deps"))):
+        digest.update(module.read_bytes())
+    digest.update(build_cache.palette_fingerprint(themes).encode())
+    return digest.hexdigest()
+
+
+def _read_cache(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        cached = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return cached if isinstance(cached, dict) and "dependencies" in cached else None
+
+
+def load_dependency_map(
+    path: Path = DEPS_PATH,
+) -> Optional[Tuple[str, Dict[str, Dict[str, List[str]]]]]:
+    """Return the sources key and map last written to ``path``.
+
+    The map is probed, so it only holds for the sources the key names; callers
+    compare it with ``sources_key`` before trusting the map.
+    """
+
+    cached = _read_cache(path)
+    return (cached.get("key", ""), cached["dependencies"]) if cached else None
+
+
+def cached_dependency_map(
+    themes: Optional[Sequence[ThemeDefinition]] = None, path: Path = DEPS_PATH
+) -> Optional[Dict[str, Dict[str, List[str]]]]:
+    """Return the cached map if its sources still match, without probing."""
+
+    if themes is None:
+        themes = (ft_palette.STANDARD_THEME, ft_palette.INVERSE_THEME)
+    cached = load_dependency_map(path)
+    if cached and cached[0] == sources_key(themes):
+        return cached[1]
+    return None
+
+
+def dependency_map(
+    themes: Optional[Sequence[ThemeDefinition]] = None, path: Path = DEPS_PATH
+) -> Dict[str, Dict[str, List[str]]]:
+    """Return the dependency map, reusing the cached one when its sources match.
+
+    A cold computation probes every source through every generator and takes
+    seconds; long-running callers should use ``refresh_in_background``.
+    """
+
+    if themes is None:
+        themes = (ft_palette.STANDARD_THEME, ft_palette.INVERSE_THEME)
+    cached = cached_dependency_map(themes, path)
+    if cached is not None:
+        return cached
+    # Key the map by the sources as they were when probing started.
+    key = sources_key(themes)
+    dependencies = compute_dependency_map(themes)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"key": key, "dependencies": dependencies}) + "\n")
+    return dependencies
+
+
+def refresh_in_background(path: Path = DEPS_PATH) -> "subprocess.Popen[bytes]":
+    """Recompute the cached map in a separate process and return it.
+
+    Probing swaps palette entries and clears the colour caches, so it must not
+    share an interpreter with a build that may run meanwhile.
+    """
+
+    return subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--refresh", "--path", str(path)],
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def impact(
+    sources: Iterable[str], dependencies: Mapping[str, Mapping[str, List[str]]]
+) -> Dict[str, List[str]]:
+    """Return ``{target: [keys]}`` affected by changing any of the sources."""
+
+    affected: Dict[str, Set[str]] = {}
+    for source in sources:
+        for target, keys in dependencies.get(source, {}).items():
+            affected.setdefault(target, set()).update(keys)
+    return {target: sorted(keys) for target, keys in sorted(affected.items())}
+
+
+def changed_sources(
+    old_palette: Mapping[str, str],
+    new_palette: Mapping[str, str],
+    old_themes: Sequence[ThemeDefinition] = (),
+    new_themes: Sequence[ThemeDefinition] = (),
+) -> Optional[List[str]]:
+    """Return the palette entries and theme fields that differ between two states.
+
+    Returns None when entries or themes were added, removed or renamed, which
+    the dependency map cannot describe.
+    """
+
+    if old_palette.keys() != new_palette.keys():
+        return None
+    if [theme.slug for theme in old_themes] != [theme.slug for theme in new_themes]:
+        return None
+    changed = [name for name in new_palette if old_palette[name] != new_palette[name]]
+    for old, new in zip(old_themes, new_themes):
+        for field in THEME_FIELDS:
+            before, after = getattr(old, field), getattr(new, field)
+            if before.name != after.name or before.hex_value != after.hex_value:
+                changed.append(f"theme:{new.slug}.{field}")
+        if old.appearance != new.appearance:
+            return None
+    return changed
+
+
+def palette_values() -> Dict[str, str]:
+    """Return the current ``{name: hex_value}`` view of the palette."""
+
+    return {color.name: color.hex_value for color in ft_palette.FT_COLOR_PALETTE}
+
+
+def describe_impact(affected: Mapping[str, List[str]]) -> str:
+    """Summarise an impact set, e.g. ``23 zed keys, 4 tmux keys``."""
+
+    if not affected:
+        return "no output keys"
+    return ", ".join(f"{len(keys)} {target} keys" for target, keys in affected.items())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Print the output keys that depend on the given palette entries."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        help="palette entry names or theme fields such as theme:standard.background",
+    )
+    parser.add_argument("--summary", action="store_true", help="only print counts")
+    parser.add_argument(
+        "--refresh", action="store_true", help="only bring the cached map up to date"
+    )
+    parser.add_argument("--path", type=Path, default=DEPS_PATH, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.refresh:
+        dependency_map(path=args.path)
+        return
+    if not args.sources:
+        parser.error("name at least one palette entry or theme field")
+
+    affected = impact(args.sources, dependency_map(path=args.path))
+    print(describe_impact(affected))
+    if not args.summary:
+        for target, keys in affected.items():
+            for key in keys:
+                print(f"  {target} {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""The 240 extended terminal colours (indices 16-255) of a theme.
+
+Terminals fall back to the stock xterm cube and grey ramp for indices
+16-255, which ignore the theme's background and clash with paper and slate.
+Here the 6x6x6 cube (16-231) is interpolated in OKLab between eight
+anchors: the background at level (0, 0, 0), the foreground at (5, 5, 5) and
+the theme's ANSI red, green, yellow, blue, magenta and cyan at the other
+corners. The 24-step grey ramp (232-255) runs from background to
+foreground. Entries meant to be read as text (the cube's outer shell and
+the upper half of the ramp) are brought to MIN_TEXT_CONTRAST in one
+lock-step bisection over all of them, instead of an ensure_contrast call
+per colour.
+
+``extended_palette`` is memoized per theme; Ghostty writes it as
+``palette = 16..255`` and other terminal targets can reuse the table.
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+from color_cache import memoize
+from color_space import Lab, oklab, oklab_hex, oklab_to_linear
+from composite import theme_colors
+from ft_palette import ThemeDefinition
+from ghostty import ansi_palette
+
+CUBE_LEVELS = 6
+GREY_STEPS = 24
+
+# WCAG 3:1 (large text and UI components) for the entries used as text.
+MIN_TEXT_CONTRAST = 3.0
+
+# Bisection rounds when moving text entries toward the foreground (1/512).
+CONTRAST_ROUNDS = 9
+
+# ANSI slots at the cube corners (red, green, blue) levels: index into the
+# 16-colour palette; (0, 0, 0) and (1, 1, 1) are the background and foreground.
+CUBE_CORNERS = {
+    (1, 0, 0): 1,
+    (0, 1, 0): 2,
+    (1, 1, 0): 3,
+    (0, 0, 1): 4,
+    (1, 0, 1): 5,
+    (0, 1, 1): 6,
+}
+
+
+def _lerp(a: Lab, b: Lab, amount: float) -> Lab:
+    return (
+        a[0] + (b[0] - a[0]) * amount,
+        a[1] + (b[1] - a[1]) * amount,
+        a[2] + (b[2] - a[2]) * amount,
+    )
+
+
+def _luminance(lab: Lab) -> float:
+    red, green, blue = (min(1.0, max(0.0, channel)) for channel in oklab_to_linear(*lab))
+    return 0.2126 * red + 0.7152 * green + 0.0722 * blue
+
+
+def _ratio(lum_a: float, lum_b: float) -> float:
+    return (max(lum_a, lum_b) + 0.05) / (min(lum_a, lum_b) + 0.05)
+
+
+def cube_labs(background: str, foreground: str, ansi: Sequence[str]) -> List[Lab]:
+    """Interpolate the 216 cube colours in xterm order (16 + 36r + 6g + b)."""
+
+    corners = {(0, 0, 0): oklab(background), (1, 1, 1): oklab(foreground)}
+    for corner, slot in CUBE_CORNERS.items():
+        corners[corner] = oklab(ansi[slot])
+    steps = [level / (CUBE_LEVELS - 1) for level in range(CUBE_LEVELS)]
+    labs = []
+    for r in steps:
+        # Collapse the red axis first, then green, then blue.
+        plane = {
+            (g, b): _lerp(corners[(0, g, b)], corners[(1, g, b)], r)
+            for g in (0, 1)
+            for b in (0, 1)
+        }
+        for g in steps:
+            edge = (_lerp(plane[(0, 0)], plane[(1, 0)], g), _lerp(plane[(0, 1)], plane[(1, 1)], g))
+            for b in steps:
+                labs.append(_lerp(edge[0], edge[1], b))
+    return labs
+
+
+def grey_labs(background: str, foreground: str) -> List[Lab]:
+    """Interpolate the grey ramp strictly between background and foreground."""
+
+    start, end = oklab(background), oklab(foreground)
+    return [_lerp(start, end, (step + 1) / (GREY_STEPS + 1)) for step in range(GREY_STEPS)]
+
+
+def text_indices() -> List[int]:
+    """Positions (in the 240-entry table) of the entries held to MIN_TEXT_CONTRAST."""
+
+    shell = [
+        36 * r + 6 * g + b
+        for r in range(CUBE_LEVELS)
+        for g in range(CUBE_LEVELS)
+        for b in range(CUBE_LEVELS)
+        if CUBE_LEVELS - 1 in (r, g, b)
+    ]
+    ramp = [CUBE_LEVELS**3 + step for step in range(GREY_STEPS // 2, GREY_STEPS)]
+    return shell + ramp
+
+
+TEXT_INDICES: Tuple[int, ...] = tuple(text_indices())
+
+
+def enforce_contrast(
+    labs: List[Lab],
+    indices: Sequence[int],
+    background: str,
+    foreground: str,
+    min_ratio: float = MIN_TEXT_CONTRAST,
+) -> None:
+    """Move the selected entries toward the foreground until they meet min_ratio.
+
+    All entries below the ratio are bisected together, one round at a time,
+    for the smallest OKLab mix toward the foreground that reaches it.
+    """
+
+    background_lum = _luminance(oklab(background))
+    target = oklab(foreground)
+    failing = [i for i in indices if _ratio(_luminance(labs[i]), background_lum) < min_ratio]
+    low = [0.0] * len(failing)
+    high = [1.0] * len(failing)
+    for _ in range(CONTRAST_ROUNDS):
+        for n, i in enumerate(failing):
+            middle = (low[n] + high[n]) / 2
+            if _ratio(_luminance(_lerp(labs[i], target, middle)), background_lum) >= min_ratio:
+                high[n] = middle
+            else:
+                low[n] = middle
+    for n, i in enumerate(failing):
+        labs[i] = _lerp(labs[i], target, high[n])
+
+
+@memoize("extended_palette", maxsize=256)
+def extended_palette(theme: ThemeDefinition) -> Tuple[str, ...]:
+    """Return the theme's colours for indices 16-255 as ``#rrggbb``."""
+
+    background, foreground = theme_colors(theme)[:2]
+    labs = cube_labs(background, foreground, ansi_palette(theme))
+    labs.extend(grey_labs(background, foreground))
+    enforce_contrast(labs, TEXT_INDICES, background, foreground)
+    return tuple(oklab_hex(lab) for lab in labs)
+
+
+def palette_256(theme: ThemeDefinition) -> Tuple[str, ...]:
+    """Return all 256 terminal colours: the ANSI palette then the extended table."""
+
+    return ansi_palette(theme) + extended_palette(theme)
@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 from typing import Iterable, List, Sequence
 
+import instrument
+from composite import flatten_color
 from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
-
-FISH_SELECTION_COLORS = {
-    "standard": "oxford-40",
-    "inverse": "jade",
-}
+from output import write_if_changed
+from quantize import fish_color, output_suffix, parse_color_mode
+from resolved_theme import resolve_theme
 
 
 def color_hex(name: str) -> str:
@@ -50,31 +51,44 @@ PAGER_KEYS = (
 )
 
 
-def build_assignment_lines(theme: ThemeDefinition) -> List[str]:
-    """Compose fish color assignments for the theme."""
+def build_assignment_lines(theme: ThemeDefinition, colors: str = "truecolor") -> List[str]:
+    """Compose fish color assignments for the theme.
+
+    ``colors`` is "truecolor" (hex), "256" or "16" (nearest xterm colours);
+    text colours are quantized against the backgrounds they are drawn on.
+    """
+
+    resolved = resolve_theme(theme)
+    on_background = (resolved.background,)
+
+    def color(value: str, on: Sequence[str] = on_background) -> str:
+        return fish_color(value, colors, on)
+
+    def named(name: str) -> str:
+        return color(flatten_color(color_hex(name), resolved.background))
 
-    fg = theme.body_text.hex_value
-    comment = theme.comment_text.hex_value
-    selection_bg = color_hex(FISH_SELECTION_COLORS.get(theme.slug, "sky"))
+    fg = color(resolved.foreground, (resolved.background, resolved.shell_selection))
+    comment = color(resolved.comment)
+    selection_bg = color(resolved.shell_selection, ())
 
     mapping = {
         "fish_color_normal": fg,
-        "fish_color_command": color_hex("teal"),
-        "fish_color_keyword": color_hex("oxford"),
-        "fish_color_quote": color_hex("mandarin"),
-        "fish_color_redirection": color_hex("oxford"),
-        "fish_color_end": color_hex("jade"),
-        "fish_color_error": color_hex("claret"),
+        "fish_color_command": named("teal"),
+        "fish_color_keyword": named("oxford"),
+        "fish_color_quote": named("mandarin"),
+        "fish_color_redirection": named("oxford"),
+        "fish_color_end": named("jade"),
+        "fish_color_error": named("claret"),
         "fish_color_param": fg,
         "fish_color_comment": comment,
         "fish_color_selection": f"--background={selection_bg}",
         "fish_color_operator": fg,
-        "fish_color_escape": color_hex("jade"),
-        "fish_color_autosuggestion": color_hex("support-text"),
-        "fish_pager_color_progress": color_hex("mandarin"),
+        "fish_color_escape": named("jade"),
+        "fish_color_autosuggestion": named("support-text"),
+        "fish_pager_color_progress": named("mandarin"),
         "fish_pager_color_background": "",
         "fish_pager_color_prefix": fg,
-        "fish_pager_color_completion": color_hex("support-text"),
+        "fish_pager_color_completion": named("support-text"),
         "fish_pager_color_description": comment,
         "fish_pager_color_selected_background": f"--background={selection_bg}",
         "fish_pager_color_selected_prefix": fg,
@@ -97,38 +111,45 @@ def build_assignment_lines(theme: ThemeDefinition) -> List[str]:
     return lines
 
 
-def build_theme_lines(theme: ThemeDefinition) -> List[str]:
+def build_theme_lines(theme: ThemeDefinition, colors: str = "truecolor") -> List[str]:
     """Return the header and assignment lines for the fish theme."""
 
     lines = [
         f"# Financial Times {theme.slug.title()} fish theme",
         "# Source this file to apply the colors globally (universal vars).",
     ]
-    lines.extend(build_assignment_lines(theme))
+    lines.extend(build_assignment_lines(theme, colors))
     return lines
 
 
-def write_theme(theme: ThemeDefinition, out_dir: Path) -> Path:
+def write_theme(theme: ThemeDefinition, out_dir: Path, colors: str = "truecolor") -> Path:
     """Write the fish theme file to the build directory."""
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    lines = build_theme_lines(theme)
-    path = out_dir / f"financial-times-{theme.slug}.theme"
-    path.write_text("\n".join(lines) + "\n")
+    with instrument.span("fish", "payload"):
+        lines = build_theme_lines(theme, colors)
+    with instrument.span("fish", "serialize"):
+        text = "\n".join(lines) + "\n"
+    path = out_dir / f"financial-times-{theme.slug}{output_suffix(colors)}.theme"
+    with instrument.span("fish", "write"):
+        write_if_changed(path, text)
     return path
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/fish"),
+    colors: str = "truecolor",
+) -> None:
     """Generate fish theme files for all configured FT variants."""
 
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    out_dir = Path("build/fish")
     for theme in themes:
-        path = write_theme(theme, out_dir)
+        path = write_theme(theme, out_dir, colors)
         print(f"wrote {path}")
 
 
 if __name__ == "__main__":
-    main()
+    main(colors=parse_color_mode(sys.argv[1:]))
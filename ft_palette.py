@@ -2,6 +2,8 @@
 
 This module is generated from the public palette documented at
 https://origami.ft.com/foundations/colours/ on the FT Origami design system.
+Regenerate ``FT_COLOR_PALETTE`` from a token dump with
+``python3 origami_import.py tokens.css`` (or ``make palette TOKENS=...``).
 """
 
 from __future__ import annotations
@@ -9,6 +11,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Tuple
 
+import instrument
+
 
 @dataclass(frozen=True)
 class FTColor:
@@ -603,11 +607,19 @@ class ThemeDefinition:
     body_text: FTColor
     comment_text: FTColor
     selection: FTColor
+    appearance: str = "light"
+
+    @property
+    def is_dark(self) -> bool:
+        """Return True for themes with a dark background."""
+
+        return self.appearance == "dark"
 
 
 def get_color(name: str) -> FTColor:
     """Return a palette entry by name, raising ValueError when absent."""
 
+    instrument.count("get_color")
     try:
         return FT_COLOR_BY_NAME[name]
     except KeyError as exc:  # pragma: no cover - defensive programming
@@ -635,6 +647,7 @@ def create_inverse_theme() -> ThemeDefinition:
         body_text=get_color("body-inverse-text"),
         comment_text=get_color("muted-inverse-text"),
         selection=get_color("black-70"),
+        appearance="dark",
     )
 
 
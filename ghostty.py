@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
-import math
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Sequence, Tuple
 
-from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
+import color_space
+import cvd
+import instrument
+from color_cache import memoize
+from composite import palette_colors, theme_colors
+from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition
+from output import write_if_changed
+from palette_store import color_record
 
 ANSI_PALETTE_NAMES: List[str] = [
     "slate",
@@ -27,36 +33,47 @@ ANSI_PALETTE_NAMES: List[str] = [
     "white",
 ]
 
+# Terminal colour slot for each entry of ANSI_PALETTE_NAMES (Zed's terminal.ansi.* keys).
+ANSI_SLOT_NAMES: List[str] = [
+    "black",
+    "red",
+    "green",
+    "yellow",
+    "blue",
+    "magenta",
+    "cyan",
+    "white",
+    "bright_black",
+    "bright_red",
+    "bright_green",
+    "bright_yellow",
+    "bright_blue",
+    "bright_magenta",
+    "bright_cyan",
+    "bright_white",
+]
+
 MIN_CONTRAST_RATIO = 5.5
 
-# Minimum luminance ratio between red/green pairs for colorblind accessibility.
-# A ratio of 2.0:1 provides strong differentiation for deuteranopia/protanopia.
-MIN_COLORBLIND_LUMINANCE_RATIO = 2.0
+# Mix-amount tolerance when solving for the least contrast-correcting blend.
+CONTRAST_PRECISION = 1 / 512
 
-# Indices in ANSI_PALETTE_NAMES that are green-ish (should be lighter than reds)
-GREEN_INDICES = {2, 10}  # jade, wasabi
-# Indices that are red-ish (reference for luminance comparison)
-RED_INDICES = {1, 9}  # claret, crimson
+# Slots never moved to separate colours under CVD simulation: the neutrals
+# (slate, paper, support-text, white) anchor the palette.
+CVD_FIXED_INDICES = frozenset({0, 7, 8, 15})
+
+# Fractions of the way toward white or black (in OKLab lightness, on the
+# foreground's side) tried when separating a colour, in order.
+CVD_MIX_STEPS = tuple(step / 16 for step in range(1, 9))
 
 
 def hex_to_rgb(color: str) -> tuple[float, float, float]:
     """Convert #rrggbb to linearized RGB components."""
 
-    color = color.lstrip("#")
-    r = int(color[0:2], 16) / 255.0
-    g = int(color[2:4], 16) / 255.0
-    b = int(color[4:6], 16) / 255.0
-
-    def to_linear(channel: float) -> float:
-        return (
-            math.pow((channel + 0.055) / 1.055, 2.4)
-            if channel > 0.04045
-            else channel / 12.92
-        )
-
-    return (to_linear(r), to_linear(g), to_linear(b))
+    return color_record(color).linear
 
 
+@memoize("relative_luminance")
 def relative_luminance(color: str) -> float:
     """Return the perceived luminance from a hex string."""
 
@@ -65,8 +82,17 @@ def relative_luminance(color: str) -> float:
 
 
 def contrast_ratio(color_a: str, color_b: str) -> float:
-    """Compute the WCAG contrast ratio between two colors."""
+    """Return the WCAG contrast ratio between two colors."""
 
+    instrument.count("contrast_ratio.calls")
+    return _contrast_ratio(color_a, color_b)
+
+
+@memoize("contrast_ratio")
+def _contrast_ratio(color_a: str, color_b: str) -> float:
+    """Compute the WCAG contrast ratio on a cache miss."""
+
+    instrument.count("contrast_ratio.computed")
     lum_a = relative_luminance(color_a)
     lum_b = relative_luminance(color_b)
     lighter = max(lum_a, lum_b)
@@ -77,28 +103,86 @@ def contrast_ratio(color_a: str, color_b: str) -> float:
 def mix_colors(color: str, fallback: str, amount: float) -> str:
     """Blend two hex colours."""
 
-    color = color.lstrip("#")
-    fallback = fallback.lstrip("#")
-    cr, cg, cb = (int(color[i : i + 2], 16) for i in (0, 2, 4))
-    fr, fg, fb = (int(fallback[i : i + 2], 16) for i in (0, 2, 4))
+    cr, cg, cb = color_record(color).rgb
+    fr, fg, fb = color_record(fallback).rgb
     nr = round(cr + (fr - cr) * amount)
     ng = round(cg + (fg - cg) * amount)
     nb = round(cb + (fb - cb) * amount)
     return f"#{nr:02x}{ng:02x}{nb:02x}"
 
 
+def contrast_extreme(background: str) -> str:
+    """Return white or black, whichever contrasts more with the background."""
+
+    white, black = "#ffffff", "#000000"
+    if contrast_ratio(white, background) >= contrast_ratio(black, background):
+        return white
+    return black
+
+
+def solve_contrast_mix(
+    color: str,
+    background: str,
+    target: str,
+    min_ratio: float = MIN_CONTRAST_RATIO,
+    precision: float = CONTRAST_PRECISION,
+) -> str | None:
+    """Bisect for the smallest mix of color toward target that meets min_ratio.
+
+    Returns None when even the target itself falls short of the ratio.
+    """
+
+    if contrast_ratio(target, background) < min_ratio:
+        return None
+    low, high = 0.0, 1.0
+    while high - low > precision:
+        instrument.count("ensure_contrast.iterations")
+        middle = (low + high) / 2
+        if contrast_ratio(mix_colors(color, target, middle), background) >= min_ratio:
+            high = middle
+        else:
+            low = middle
+    return mix_colors(color, target, high)
+
+
 def ensure_contrast(
-    color: str, background: str, fallback: str, min_ratio: float = MIN_CONTRAST_RATIO
+    color: str,
+    background: str,
+    fallback: str | None = None,
+    min_ratio: float = MIN_CONTRAST_RATIO,
+    precision: float = CONTRAST_PRECISION,
+) -> str:
+    """Return a color with acceptable contrast to the background.
+
+    The color is mixed toward the fallback as little as possible; when the
+    fallback cannot reach the ratio (or is None) it is mixed toward white or
+    black instead.
+    """
+
+    instrument.count("ensure_contrast.calls")
+    return _ensure_contrast(color, background, fallback, min_ratio, precision)
+
+
+@memoize("ensure_contrast")
+def _ensure_contrast(
+    color: str,
+    background: str,
+    fallback: str | None,
+    min_ratio: float,
+    precision: float,
 ) -> str:
-    """Return a color with acceptable contrast to the background."""
+    """Solve ensure_contrast on a cache miss."""
 
+    instrument.count("ensure_contrast.computed")
     if contrast_ratio(color, background) >= min_ratio:
         return color
-    for amount in [0.05 * i for i in range(1, 21)]:
-        candidate = mix_colors(color, fallback, amount)
-        if contrast_ratio(candidate, background) >= min_ratio:
+    extreme = contrast_extreme(background)
+    targets = [fallback, extreme] if fallback is not None else [extreme]
+    for target in targets:
+        candidate = solve_contrast_mix(color, background, target, min_ratio, precision)
+        if candidate is not None:
             return candidate
-    return fallback
+    return extreme
 
 
 def trim_hash(value: str) -> str:
@@ -107,74 +191,99 @@ def trim_hash(value: str) -> str:
     return value.lstrip("#")
 
 
-def luminance_ratio(color_a: str, color_b: str) -> float:
-    """Compute the luminance ratio between two colors (lighter/darker)."""
-
-    lum_a = relative_luminance(color_a)
-    lum_b = relative_luminance(color_b)
-    lighter = max(lum_a, lum_b)
-    darker = min(lum_a, lum_b)
-    if darker == 0:
-        return float("inf")
-    return lighter / darker
-
-
-def build_palette_values(theme: ThemeDefinition) -> List[str]:
-    """Map the configured palette names to hex values with contrast fixes."""
+def separate_cvd_pairs(values: List[str], background: str, fallback: str) -> None:
+    """Shift ANSI colours' lightness until pairs that collapse under CVD separate.
+
+    Colours are lightened on dark themes and darkened on light ones, keeping
+    their hue. Failing pairs are taken worst first; for each, both colours are
+    tried at the smallest step in CVD_MIX_STEPS that separates the pair and
+    keeps MIN_CONTRAST_RATIO, and the one that removes the most failing pairs
+    overall is applied. Every move removes at least one failure, and pairs
+    that no move can separate are left as they are.
+    """
+
+    # Lightness moves toward the foreground, so contrast only improves.
+    toward_light = relative_luminance(fallback) > relative_luminance(background)
+    shift = color_space.lighten if toward_light else color_space.darken
+    table = cvd.PairTable(values)
+    while True:
+        move = None
+        for pair in table.failing():
+            best: Tuple[int, float, int, str] | None = None
+            for index, other in ((pair.first, pair.second), (pair.second, pair.first)):
+                if index in CVD_FIXED_INDICES:
+                    continue
+                before = table.failures_with(index)
+                for amount, candidate in zip(CVD_MIX_STEPS, shift(values[index], CVD_MIX_STEPS)):
+                    instrument.count("cvd.candidates")
+                    if contrast_ratio(candidate, background) < MIN_CONTRAST_RATIO:
+                        continue
+                    if table.pair_with(index, other, candidate).fails(table.min_delta_e):
+                        continue
+                    gain = before - table.failures_with(index, candidate)
+                    if gain > 0 and (best is None or (gain, -amount) > best[:2]):
+                        best = (gain, -amount, index, candidate)
+                    break
+            if best is not None:
+                move = best[2:]
+                break
+        if move is None:
+            return
+        index, candidate = move
+        values[index] = candidate
+        table.replace(index, candidate)
+
+
+@memoize("ansi_palette", maxsize=256)
+def ansi_palette(theme: ThemeDefinition) -> Tuple[str, ...]:
+    """Return the theme's 16 contrast-fixed ANSI colours as ``#rrggbb``.
+
+    This is the per-theme palette shared by every terminal-style target
+    (Ghostty, Zellij and Zed's terminal colours); it is solved once per theme
+    and served from the cache afterwards.
+    """
 
     background = theme.background.hex_value
     fallback = theme.body_text.hex_value
-    is_dark_theme = relative_luminance(background) < 0.2
 
-    # First pass: ensure contrast with background
+    # First pass: ensure contrast with background (translucent entries are
+    # flattened over it first)
     values: List[str] = []
-    for name in ANSI_PALETTE_NAMES:
-        color = get_color(name).hex_value
+    for color in palette_colors(ANSI_PALETTE_NAMES, background):
         color = ensure_contrast(color, background, fallback)
         values.append(color)
 
-    # Second pass: ensure colorblind accessibility on dark themes
-    # Boost green luminance if too close to corresponding red
-    if is_dark_theme:
-        for green_idx in GREEN_INDICES:
-            # Find corresponding red (0-7 normal, 8-15 bright)
-            red_idx = green_idx - 1  # jade(2)->claret(1), wasabi(10)->crimson(9)
-            if red_idx not in RED_INDICES:
-                continue
-
-            green_color = values[green_idx]
-            red_color = values[red_idx]
-            green_lum = relative_luminance(green_color)
-            red_lum = relative_luminance(red_color)
-
-            # Green should be noticeably lighter than red
-            current_ratio = green_lum / red_lum if red_lum > 0 else float("inf")
-
-            if current_ratio < MIN_COLORBLIND_LUMINANCE_RATIO:
-                # Boost green luminance by mixing more toward white
-                target_lum = red_lum * MIN_COLORBLIND_LUMINANCE_RATIO
-                for amount in [0.05 * i for i in range(1, 21)]:
-                    candidate = mix_colors(green_color, fallback, amount)
-                    if relative_luminance(candidate) >= target_lum:
-                        # Verify we still have good background contrast
-                        if contrast_ratio(candidate, background) >= MIN_CONTRAST_RATIO:
-                            values[green_idx] = candidate
-                        break
-
-    return [trim_hash(c) for c in values]
-
-
-def build_theme_lines(theme: ThemeDefinition, palette_values: List[str]) -> List[str]:
+    # Second pass: separate colours that collapse under colour-vision deficiency
+    separate_cvd_pairs(values, background, fallback)
+
+    return tuple(values)
+
+
+def ansi_colors(theme: ThemeDefinition) -> Dict[str, str]:
+    """Return the theme's ANSI palette keyed by FT palette name."""
+
+    return dict(zip(ANSI_PALETTE_NAMES, ansi_palette(theme)))
+
+
+def build_palette_values(theme: ThemeDefinition) -> List[str]:
+    """Return the theme's 256 palette colours as bare hex values for Ghostty."""
+
+    # extended_palette builds on ansi_palette, so it is imported on use.
+    from extended_palette import palette_256
+
+    return [trim_hash(c) for c in palette_256(theme)]
+
+
+def build_theme_lines(theme: ThemeDefinition, palette_values: Sequence[str]) -> List[str]:
     """Compose the Ghostty config lines for a given theme."""
 
     lines = [f"# Financial Times {theme.slug.title()} (Ghostty)"]
     for index, hex_value in enumerate(palette_values):
         lines.append(f"palette = {index}=#{hex_value}")
 
-    background = trim_hash(theme.background.hex_value)
-    foreground = trim_hash(theme.body_text.hex_value)
-    selection_bg = trim_hash(theme.selection.hex_value)
-    comment = trim_hash(theme.comment_text.hex_value)
+    background, foreground, comment, selection_bg = (
+        trim_hash(color) for color in theme_colors(theme)
+    )
 
     lines.extend(
         [
@@ -191,26 +300,33 @@ def build_theme_lines(theme: ThemeDefinition, palette_values: List[str]) -> List
 
 
 def write_theme(
-    theme: ThemeDefinition, palette_values: List[str], out_dir: Path
+    theme: ThemeDefinition, palette_values: Sequence[str], out_dir: Path
 ) -> Path:
     """Write a Ghostty theme file for the given theme object."""
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    lines = build_theme_lines(theme, palette_values)
+    with instrument.span("ghostty", "payload"):
+        lines = build_theme_lines(theme, palette_values)
+    with instrument.span("ghostty", "serialize"):
+        text = "\n".join(lines) + "\n"
     path = out_dir / f"financial-times-{theme.slug}"
-    path.write_text("\n".join(lines) + "\n")
+    with instrument.span("ghostty", "write"):
+        write_if_changed(path, text)
     return path
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/ghostty"),
+) -> None:
     """Generate Ghostty themes for all configured FT variants."""
 
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    out_dir = Path("build/ghostty")
     for theme in themes:
-        palette_values = build_palette_values(theme)
+        with instrument.span("ghostty", "payload"):
+            palette_values = build_palette_values(theme)
         path = write_theme(theme, palette_values, out_dir)
         print(f"wrote {path}")
 
@@ -0,0 +1,126 @@
+"""Opt-in build instrumentation: per-target stage timings and colour-op counters.
+
+Enable it with ``FT_THEME_INSTRUMENT=1`` (any generator script) or
+``python3 build.py --instrument``. While enabled, generators time their
+payload, serialize, write and package stages, colour helpers count their
+work, and a JSON report is written to ``build/instrumentation.json`` when
+the interpreter exits. Memoized colour ops count both their calls and their
+computations (``contrast_ratio.calls`` / ``contrast_ratio.computed``), so
+the report shows whether colour math is doing real work or hitting the
+caches. When disabled every hook is a single flag check.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ENV_VAR = "FT_THEME_INSTRUMENT"
+REPORT_PATH = Path("build/instrumentation.json")
+
+ENABLED = os.environ.get(ENV_VAR, "") not in ("", "0")
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans: Dict[str, Dict[str, Dict[str, float]]] = {}
+_counters: Counter = Counter()
+_started = time.perf_counter()
+_registered = False
+
+
+def enable(report_at_exit: bool = True) -> None:
+    """Turn instrumentation on, by default writing the report at interpreter exit."""
+
+    global ENABLED, _registered
+    ENABLED = True
+    if report_at_exit and not _registered:
+        atexit.register(write_report)
+        _registered = True
+
+
+def reset() -> None:
+    """Forget every recorded span and counter."""
+
+    global _started
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.perf_counter()
+
+
+@contextmanager
+def span(target: str, stage: str) -> Iterator[None]:
+    """Accumulate the wall time of a generator stage when enabled.
+
+    Time spent in spans nested inside this one (on the same thread) is left
+    out, so a write stage that drives a chunk generator, like Zed's streamed
+    bundle, is charged only for its own I/O while the generator's payload and
+    serialize spans are charged to those stages.
+    """
+
+    if not ENABLED:
+        yield
+        return
+    nested: List[float] = _local.__dict__.setdefault("nested", [])
+    nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        own = elapsed - nested.pop()
+        if nested:
+            nested[-1] += elapsed
+        with _lock:
+            stage_totals = _spans.setdefault(target, {}).setdefault(
+                stage, {"seconds": 0.0, "calls": 0}
+            )
+            stage_totals["seconds"] += own
+            stage_totals["calls"] += 1
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a named counter when enabled."""
+
+    if ENABLED:
+        with _lock:
+            _counters[name] += amount
+
+
+def report() -> Dict[str, object]:
+    """Return the recorded spans, counters, colour cache and output write statistics."""
+
+    from color_cache import cache_stats
+    from output import write_stats
+
+    with _lock:
+        return {
+            "wall_seconds": time.perf_counter() - _started,
+            "targets": {
+                target: {stage: dict(totals) for stage, totals in stages.items()}
+                for target, stages in _spans.items()
+            },
+            "counters": dict(_counters),
+            "caches": cache_stats(),
+            "outputs": write_stats(),
+        }
+
+
+def write_report(path: Path = REPORT_PATH) -> Path:
+    """Write the report as JSON next to the build output."""
+
+    import json
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report(), indent=2, sort_keys=True) + "\n")
+    return path
+
+
+if ENABLED:
+    enable()
@@ -0,0 +1,293 @@
+"""Import the FT palette from Origami design-token dumps.
+
+Reads either a CSS custom-properties file (``--o3-color-palette-paper: #fff1e5;``)
+or a design-token JSON file, flat (``{"--o3-color-palette-paper": "#fff1e5"}``)
+or nested (``{"o3": {"color": {"palette": {"paper": {"$value": ...}}}}}``).
+Only ``--o3-color-palette-*`` and ``--o3-color-use-case-*`` tokens are kept;
+``var(...)`` and ``{o3.color...}`` references are resolved, and values are
+normalised to ``#rrggbb``, ``#rrggbbaa`` or ``rgba(r, g, b, a)``.
+
+Token dumps are large, so the parsed tokens are cached under
+``build/.origami-cache`` keyed by the file's SHA-256; re-importing an
+unchanged dump skips parsing. The result is merged into ``FT_COLOR_PALETTE``
+and written back to ``ft_palette.py``, only touching the file when it changes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import marshal
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ft_palette import FT_COLOR_PALETTE, FTColor
+from output import write_if_changed
+
+CACHE_DIR = Path(__file__).resolve().parent / "build" / ".origami-cache"
+CACHE_VERSION = 1
+PALETTE_MODULE = Path(__file__).resolve().parent / "ft_palette.py"
+
+TOKEN_PREFIXES = ("--o3-color-palette-", "--o3-color-use-case-")
+
+# (css_variable, value, description)
+Token = Tuple[str, str, str]
+
+_CSS_DECLARATION = re.compile(
+    r"(?:/\*(?P<comment>(?:[^*]|\*(?!/))*)\*/\s*)?"
+    r"(?P<name>--o3-color-(?:palette|use-case)-[\w-]+)\s*:\s*(?P<value>[^;}]+)"
+)
+_VAR_REFERENCE = re.compile(r"var\(\s*(--[\w-]+)\s*(?:,[^)]*)?\)")
+_JSON_REFERENCE = re.compile(r"\{([\w.-]+)\}")
+_RGB_FUNCTION = re.compile(
+    r"rgba?\(\s*(\d+)\s*,?\s*(\d+)\s*,?\s*(\d+)\s*(?:[,/]\s*([\d.]+%?)\s*)?\)"
+)
+
+
+def parse_css(text: str) -> List[Token]:
+    """Return the colour tokens declared in a CSS custom-properties file.
+
+    A ``/* comment */`` directly before a declaration becomes its description.
+    """
+
+    tokens: Dict[str, Token] = {}
+    for match in _CSS_DECLARATION.finditer(text):
+        name = match.group("name")
+        description = " ".join((match.group("comment") or "").split())
+        tokens[name] = (name, match.group("value").strip(), description)
+    return list(tokens.values())
+
+
+def _json_leaves(node: object, path: Tuple[str, ...]) -> Iterable[Token]:
+    if isinstance(node, dict):
+        value = node.get("$value", node.get("value"))
+        if isinstance(value, str):
+            description = node.get("$description", node.get("description", ""))
+            yield "--" + "-".join(path), value, str(description or "")
+            return
+        for key, child in node.items():
+            if not key.startswith("$"):
+                yield from _json_leaves(child, path + (key,))
+    elif isinstance(node, str) and path:
+        yield "--" + "-".join(path).lstrip("-"), node, ""
+
+
+def parse_json(text: str) -> List[Token]:
+    """Return the colour tokens in a flat or nested design-token JSON file."""
+
+    tokens: Dict[str, Token] = {}
+    for name, value, description in _json_leaves(json.loads(text), ()):
+        name = "--" + name.lstrip("-")
+        if name.startswith(TOKEN_PREFIXES):
+            tokens[name] = (name, value, description)
+    return list(tokens.values())
+
+
+def normalize_value(value: str) -> str:
+    """Normalise a CSS colour to ``#rrggbb``, ``#rrggbbaa`` or ``rgba(r, g, b, a)``."""
+
+    value = value.strip().lower()
+    match = _RGB_FUNCTION.fullmatch(value)
+    if match:
+        red, green, blue, alpha = match.groups()
+        if alpha is None:
+            opacity = 1.0
+        elif alpha.endswith("%"):
+            opacity = float(alpha[:-1]) / 100
+        else:
+            opacity = float(alpha)
+        if opacity >= 1.0:
+            return f"#{int(red):02x}{int(green):02x}{int(blue):02x}"
+        return f"rgba({int(red)}, {int(green)}, {int(blue)}, {opacity:g})"
+    digits = value.lstrip("#")
+    if value.startswith("#") and re.fullmatch(r"[0-9a-f]+", digits):
+        if len(digits) in (3, 4):
+            digits = "".join(digit * 2 for digit in digits)
+        if len(digits) == 8 and digits.endswith("ff"):
+            digits = digits[:6]
+        if len(digits) in (6, 8):
+            return f"#{digits}"
+    raise ValueError(f"Unsupported colour value '{value}'")
+
+
+def resolve_tokens(tokens: Sequence[Token]) -> List[Token]:
+    """Resolve ``var(--...)`` and ``{o3.color...}`` references and normalise values."""
+
+    raw = {name: value for name, value, _ in tokens}
+    resolved: Dict[str, str] = {}
+
+    def resolve(name: str, seen: Tuple[str, ...]) -> str:
+        if name in resolved:
+            return resolved[name]
+        if name in seen:
+            raise ValueError(f"Circular colour token reference: {' -> '.join(seen + (name,))}")
+        if name not in raw:
+            raise ValueError(f"Unknown colour token '{name}'")
+        value = raw[name].strip()
+        reference = _VAR_REFERENCE.fullmatch(value) or _JSON_REFERENCE.fullmatch(value)
+        if reference:
+            target = reference.group(1)
+            if not target.startswith("--"):
+                target = "--" + target.replace(".", "-")
+            result = resolve(target, seen + (name,))
+        else:
+            result = normalize_value(value)
+        resolved[name] = result
+        return result
+
+    return [(name, resolve(name, ()), description) for name, _, description in tokens]
+
+
+def parse_tokens(path: Path) -> List[Token]:
+    """Parse a CSS or JSON token file into resolved colour tokens."""
+
+    text = path.read_text(encoding="utf-8")
+    tokens = parse_json(text) if path.suffix == ".json" else parse_css(text)
+    return resolve_tokens(tokens)
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 of a file, read in blocks."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_tokens(path: Path, cache_dir: Path = CACHE_DIR) -> Tuple[List[Token], bool]:
+    """Return the file's resolved tokens and whether they came from the cache."""
+
+    cache_path = cache_dir / f"{file_digest(path)}.marshal"
+    try:
+        version, tokens = marshal.loads(cache_path.read_bytes())
+        if version == CACHE_VERSION:
+            return [tuple(token) for token in tokens], True
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    tokens = parse_tokens(path)
+    write_if_changed(cache_path, marshal.dumps((CACHE_VERSION, tokens)))
+    return tokens, False
+
+
+def token_name(css_variable: str) -> str:
+    """Return the palette entry name of a token (its name after the prefix)."""
+
+    for prefix in TOKEN_PREFIXES:
+        if css_variable.startswith(prefix):
+            return css_variable[len(prefix) :]
+    raise ValueError(f"Not an Origami colour token: '{css_variable}'")
+
+
+def merge_palette(
+    tokens: Sequence[Token], existing: Sequence[FTColor], prune: bool = False
+) -> Tuple[Tuple[FTColor, ...], Dict[str, List[str]]]:
+    """Merge imported tokens into the existing palette.
+
+    Existing entries keep their order and, when a token has none, their
+    description; new tokens are appended after the last token-backed entry,
+    ahead of local entries that have no CSS variable. Token-backed entries
+    missing from the import are kept unless ``prune`` is set. Returns the
+    palette and the names updated, added, missing and pruned.
+    """
+
+    by_variable = {css_variable: (value, description) for css_variable, value, description in tokens}
+    counts = Counter(token_name(css_variable) for css_variable, _, _ in tokens)
+    duplicates = sorted(name for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Tokens map to the same palette name: {', '.join(duplicates)}")
+
+    report: Dict[str, List[str]] = {"updated": [], "added": [], "missing": [], "pruned": []}
+    merged: List[FTColor] = []
+    local: List[FTColor] = []
+    for color in existing:
+        if not color.css_variable:
+            local.append(color)
+            continue
+        if color.css_variable not in by_variable:
+            report["pruned" if prune else "missing"].append(color.name)
+            if not prune:
+                merged.append(color)
+            continue
+        value, description = by_variable.pop(color.css_variable)
+        updated = FTColor(
+            name=color.name,
+            css_variable=color.css_variable,
+            description=description or color.description,
+            hex_value=value,
+        )
+        if updated != color:
+            report["updated"].append(color.name)
+        merged.append(updated)
+
+    for css_variable, (value, description) in by_variable.items():
+        name = token_name(css_variable)
+        merged.append(FTColor(name, css_variable, description, value))
+        report["added"].append(name)
+    return tuple(merged + local), report
+
+
+def _quote(text: str) -> str:
+    if '"' in text and "'" not in text:
+        return f"'{text}'"
+    return json.dumps(text, ensure_ascii=False)
+
+
+def render_palette(colors: Iterable[FTColor]) -> str:
+    """Render ``FT_COLOR_PALETTE`` as it appears in ft_palette.py."""
+
+    lines = ["FT_COLOR_PALETTE: Tuple[FTColor, ...] = ("]
+    for color in colors:
+        lines.extend(
+            [
+                "    FTColor(",
+                f"        name={_quote(color.name)},",
+                f"        css_variable={_quote(color.css_variable)},",
+                f"        description={_quote(color.description)},",
+                f"        hex_value={_quote(color.hex_value)},",
+                "    ),",
+            ]
+        )
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def write_palette_module(colors: Iterable[FTColor], path: Path = PALETTE_MODULE) -> bool:
+    """Replace the palette tuple in ft_palette.py; return True if it changed."""
+
+    source = path.read_text(encoding="utf-8")
+    start = source.index("FT_COLOR_PALETTE: Tuple[FTColor, ...] = (\n")
+    end = source.index("\n)\n", start) + len("\n)\n")
+    return write_if_changed(path, source[:start] + render_palette(colors) + source[end:])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Import a token file and update ft_palette.py."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tokens", type=Path, help="Origami CSS or design-token JSON file")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="drop token-backed entries that are missing from the file",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    args = parser.parse_args(argv)
+
+    tokens, cached = load_tokens(args.tokens)
+    palette, report = merge_palette(tokens, FT_COLOR_PALETTE, prune=args.prune)
+    print(f"{len(tokens)} colour tokens ({'cached' if cached else 'parsed'})")
+    for kind, names in report.items():
+        if names:
+            print(f"{kind}: {', '.join(names)}")
+    if not args.dry_run:
+        changed = write_palette_module(palette)
+        print(f"{'wrote' if changed else 'unchanged'} {PALETTE_MODULE.name}")
+
+
+if __name__ == "__main__":
+    main()
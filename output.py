@@ -0,0 +1,152 @@
+"""Write build outputs only when their contents change.
+
+Every generator writes through ``write_if_changed``. A file whose bytes
+already match is left alone, so its mtime does not move and editors, file
+watchers and installs that key on mtimes do not see a spurious change.
+Changed files are written to a temporary file in the same directory and
+renamed into place, so readers never observe a partial theme. Large outputs
+can be streamed with ``write_chunks_if_changed``, which compares against the
+old file chunk by chunk instead of holding the whole text.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple, Union
+
+# os.umask can only be read by setting it, so read it once at import.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# What open() would create: new files follow the user's umask.
+DEFAULT_MODE = 0o666 & ~_UMASK
+
+_lock = threading.Lock()
+_stats = {"written": 0, "skipped": 0}
+_temp_ids = itertools.count()
+
+
+def _unchanged(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
+
+def _encode(contents: Union[str, bytes]) -> bytes:
+    return contents.encode("utf-8") if isinstance(contents, str) else contents
+
+
+def _count(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+
+def _temp_file(path: Path) -> Tuple[int, str]:
+    # Unique per process and call; tempfile is avoided to keep imports light.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        tmp_name = str(path.with_name(f".{path.name}.{os.getpid()}.{next(_temp_ids)}.tmp"))
+        try:
+            return os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), tmp_name
+        except FileExistsError:
+            continue
+
+
+def _install(tmp_name: str, path: Path) -> None:
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = DEFAULT_MODE
+    os.chmod(tmp_name, mode)
+    os.replace(tmp_name, path)
+
+
+def write_if_changed(path: Path, contents: Union[str, bytes]) -> bool:
+    """Atomically write ``contents`` to ``path`` unless it already holds them.
+
+    Returns True when the file was written and False when it was skipped.
+    """
+
+    data = _encode(contents)
+    if _unchanged(path, data):
+        _count("skipped")
+        return False
+
+    fd, tmp_name = _temp_file(path)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        _install(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    _count("written")
+    return True
+
+
+def write_chunks_if_changed(path: Path, chunks: Iterable[Union[str, bytes]]) -> bool:
+    """Stream ``chunks`` to ``path``, comparing with the old file as they arrive.
+
+    Only one chunk is held in memory at a time. The chunks always go to a
+    temporary file; it replaces ``path`` only if the contents differ.
+    Returns True when the file was written.
+    """
+
+    fd, tmp_name = _temp_file(path)
+    try:
+        try:
+            existing: Optional[BinaryIO] = open(path, "rb")
+        except FileNotFoundError:
+            existing = None
+        same = existing is not None
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in chunks:
+                    data = _encode(chunk)
+                    handle.write(data)
+                    if same:
+                        same = existing.read(len(data)) == data
+            if same:
+                same = existing.read(1) == b""
+        finally:
+            if existing is not None:
+                existing.close()
+        if same:
+            os.unlink(tmp_name)
+            _count("skipped")
+            return False
+        _install(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    _count("written")
+    return True
+
+
+def write_stats() -> Dict[str, int]:
+    """Return how many files were written and skipped since the last reset."""
+
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    """Zero the written/skipped counters."""
+
+    with _lock:
+        _stats["written"] = 0
+        _stats["skipped"] = 0
+
+
+def format_stats() -> str:
+    """Summarise the counters, e.g. ``outputs: 2 written, 14 unchanged``."""
+
+    stats = write_stats()
+    return f"outputs: {stats['written']} written, {stats['skipped']} unchanged"
@@ -0,0 +1,155 @@
+"""Snap derived colours back onto FT palette swatches.
+
+The generators derive off-palette colours by mixing (surfaces, borders,
+contrast fixes). With snapping enabled (``python3 build.py --snap`` or
+``enable()``), every derived role of a ``ResolvedTheme`` whose nearest
+opaque palette entry lies within ``tolerance`` (ΔE OK) is replaced by that
+entry, so the outputs stay on brand. Roles that had contrast enforced only
+snap when the swatch keeps that contrast. Nearest swatches come from a k-d
+``ColorIndex`` over the palette and are memoized per colour; every snap is
+recorded for ``snap_report``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from color_cache import clear_caches, memoize
+from color_index import ColorIndex
+from ft_palette import FT_COLOR_PALETTE
+
+# About twice the just-noticeable difference in OKLab.
+SNAP_TOLERANCE = 0.02
+
+ENABLED = False
+TOLERANCE = SNAP_TOLERANCE
+
+_lock = threading.Lock()
+_snaps: Dict["Snap", None] = {}
+_index: Optional[Tuple[Tuple[str, ...], ColorIndex]] = None
+
+
+class Snap(NamedTuple):
+    """One derived colour replaced by a palette swatch."""
+
+    theme: str
+    role: str
+    original: str
+    swatch: str
+    value: str
+    delta_e: float
+
+
+def swatch_index() -> Tuple[Tuple[str, ...], ColorIndex]:
+    """Return the names and index of the opaque palette entries, built on first use."""
+
+    global _index
+    if _index is None:
+        swatches: Dict[str, str] = {}
+        for color in FT_COLOR_PALETTE:
+            value = color.hex_value.lower()
+            if len(value) == 7 and value.startswith("#"):
+                swatches.setdefault(value, color.name)
+        _index = (tuple(swatches.values()), ColorIndex(tuple(swatches)))
+    return _index
+
+
+@memoize("nearest_swatch")
+def nearest_swatch(color: str) -> Tuple[str, str, float]:
+    """Return (name, hex, ΔE OK) of the palette swatch nearest to a colour."""
+
+    names, index = swatch_index()
+    entry, distance = index.nearest(color)
+    return names[entry], index.colors[entry], distance
+
+
+def enable(tolerance: float = SNAP_TOLERANCE) -> None:
+    """Turn snapping on and forget earlier snaps and resolved themes."""
+
+    global ENABLED, TOLERANCE
+    ENABLED, TOLERANCE = True, tolerance
+    reset()
+
+
+def disable() -> None:
+    """Turn snapping off."""
+
+    global ENABLED
+    ENABLED = False
+    reset()
+
+
+def reset() -> None:
+    """Clear the snap report and the colour caches that depend on the mode."""
+
+    with _lock:
+        _snaps.clear()
+    clear_caches()
+
+
+def record(snap: Snap) -> None:
+    """Add a snap to the report.
+
+    Generator threads can resolve the same theme concurrently, so repeated
+    snaps are kept once.
+    """
+
+    with _lock:
+        _snaps.setdefault(snap)
+
+
+def snap_report() -> List[Snap]:
+    """Return the snaps made since snapping was enabled, in order."""
+
+    with _lock:
+        return list(_snaps)
+
+
+def format_report(snaps: Optional[Sequence[Snap]] = None, detail: bool = False) -> str:
+    """Summarise the snaps, optionally one line per snap."""
+
+    snaps = snap_report() if snaps is None else snaps
+    if not snaps:
+        return f"snap: no derived colours within ΔE {TOLERANCE:g} of a swatch"
+    worst = max(snap.delta_e for snap in snaps)
+    themes = len({snap.theme for snap in snaps})
+    lines = [
+        f"snap: {len(snaps)} derived colour(s) snapped across {themes} theme(s), "
+        f"max ΔE {worst:.4f}"
+    ]
+    if detail:
+        for snap in snaps:
+            lines.append(
+                f"  {snap.theme}.{snap.role}: {snap.original} -> {snap.swatch} "
+                f"({snap.value}, ΔE {snap.delta_e:.4f})"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Print the snaps the shipped themes would get at a tolerance."""
+
+    # resolve_theme reads the imported module's state, not this script's.
+    import palette_snap
+    from ft_palette import INVERSE_THEME, STANDARD_THEME
+    from resolved_theme import resolve_theme
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=SNAP_TOLERANCE,
+        help="largest ΔE OK to snap across (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    palette_snap.enable(args.tolerance)
+    for theme in (STANDARD_THEME, INVERSE_THEME):
+        resolve_theme(theme)
+    print(palette_snap.format_report(detail=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Compact, pre-parsed storage for FT palette colours.
+
+``FTColor`` keeps colours as strings; the helpers here parse each value once
+into packed 24-bit RGB, alpha, sRGB floats and linear-light channels so the
+generators' colour math never re-slices hex strings.
+
+Parsing the palette is the one piece of palette work done on every import,
+so ``write_snapshot`` (run by ``build.py``) stores the parsed channels in a
+marshal file under ``build/``. Imports reuse it while it matches the palette
+entry for entry, and parse from ``ft_palette`` otherwise.
+"""
+
+from __future__ import annotations
+
+import marshal
+import math
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from color_cache import memoize
+from ft_palette import FT_COLOR_PALETTE, FTColor
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent / "build" / ".palette_snapshot"
+SNAPSHOT_VERSION = 1
+
+# Legacy ``rgba(r, g, b, a)`` and modern ``rgb(r g b / a)`` syntax; the
+# alpha may be a fraction or a percentage.
+_RGBA_PATTERN = re.compile(
+    r"rgba?\(\s*(\d+)\s*(?:,\s*|\s+)(\d+)\s*(?:,\s*|\s+)(\d+)\s*"
+    r"(?:[,/]\s*([\d.]+%?)\s*)?\)"
+)
+
+
+def to_linear(channel: float) -> float:
+    """Decode a gamma-encoded sRGB channel in 0..1 to linear light."""
+
+    return (
+        math.pow((channel + 0.055) / 1.055, 2.4)
+        if channel > 0.04045
+        else channel / 12.92
+    )
+
+
+def parse_components(value: str) -> Tuple[int, int, int, float]:
+    """Parse a CSS hex (``#rgb[a]``, ``#rrggbb[aa]``) or ``rgb[a](...)`` colour.
+
+    Returns (r, g, b, alpha) with alpha in 0..1.
+    """
+
+    value = value.strip()
+    match = _RGBA_PATTERN.fullmatch(value)
+    if match:
+        red, green, blue, alpha = match.groups()
+        if alpha is None:
+            opacity = 1.0
+        elif alpha.endswith("%"):
+            opacity = float(alpha[:-1]) / 100
+        else:
+            opacity = float(alpha)
+        return int(red), int(green), int(blue), min(1.0, opacity)
+    digits = value.lstrip("#")
+    if len(digits) in (3, 4):
+        digits = "".join(digit * 2 for digit in digits)
+    if len(digits) not in (6, 8):
+        raise ValueError(f"Unsupported colour value '{value}'")
+    alpha = int(digits[6:8], 16) / 255.0 if len(digits) == 8 else 1.0
+    return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16), alpha
+
+
+class ColorRecord:
+    """A parsed colour: packed RGB, alpha, sRGB floats and linear channels."""
+
+    __slots__ = ("packed", "alpha", "srgb", "linear")
+
+    def __init__(self, red: int, green: int, blue: int, alpha: float = 1.0) -> None:
+        self.packed = (red << 16) | (green << 8) | blue
+        self.alpha = alpha
+        self.srgb = (red / 255.0, green / 255.0, blue / 255.0)
+        self.linear = tuple(to_linear(channel) for channel in self.srgb)
+
+    @classmethod
+    def from_channels(
+        cls,
+        packed: int,
+        alpha: float,
+        srgb: Tuple[float, float, float],
+        linear: Tuple[float, float, float],
+    ) -> "ColorRecord":
+        """Rebuild a record from already-parsed channels."""
+
+        record = cls.__new__(cls)
+        record.packed = packed
+        record.alpha = alpha
+        record.srgb = srgb
+        record.linear = linear
+        return record
+
+    @property
+    def rgb(self) -> Tuple[int, int, int]:
+        """Return the 0..255 integer channels."""
+
+        packed = self.packed
+        return (packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF
+
+    @property
+    def hex(self) -> str:
+        """Return the opaque ``#rrggbb`` form."""
+
+        return f"#{self.packed:06x}"
+
+    def __repr__(self) -> str:
+        return f"ColorRecord({self.hex}, alpha={self.alpha:g})"
+
+
+class PaletteStore:
+    """Parallel arrays of pre-parsed palette colours, indexed by position.
+
+    Hot data lives in flat arrays (``packed``, ``alpha``, and three floats per
+    colour in ``srgb`` and ``linear``); descriptions and CSS variables are
+    kept apart in ``metadata`` because the generators never read them.
+    """
+
+    def __init__(self, colors: Iterable[FTColor], snapshot: Optional[bytes] = None) -> None:
+        colors = tuple(colors)
+        self.names: Tuple[str, ...] = tuple(color.name for color in colors)
+        self.values: Tuple[str, ...] = tuple(color.hex_value for color in colors)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.packed = array("I")
+        self.alpha = array("d")
+        self.srgb = array("d")
+        self.linear = array("d")
+        if snapshot is not None and self._load_snapshot(snapshot):
+            srgb, linear = self.srgb, self.linear
+            self.records: Tuple[ColorRecord, ...] = tuple(
+                ColorRecord.from_channels(
+                    self.packed[i],
+                    self.alpha[i],
+                    (srgb[3 * i], srgb[3 * i + 1], srgb[3 * i + 2]),
+                    (linear[3 * i], linear[3 * i + 1], linear[3 * i + 2]),
+                )
+                for i in range(len(colors))
+            )
+        else:
+            self.records = tuple(
+                ColorRecord(*parse_components(color.hex_value)) for color in colors
+            )
+            for record in self.records:
+                self.packed.append(record.packed)
+                self.alpha.append(record.alpha)
+                self.srgb.extend(record.srgb)
+                self.linear.extend(record.linear)
+        self.by_value: Dict[str, ColorRecord] = {
+            color.hex_value: record for color, record in zip(colors, self.records)
+        }
+        self.metadata: Dict[str, Tuple[str, str]] = {
+            color.name: (color.css_variable, color.description) for color in colors
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def record(self, name: str) -> ColorRecord:
+        """Return the parsed record of a palette entry by name."""
+
+        try:
+            return self.records[self.index[name]]
+        except KeyError as exc:
+            raise ValueError(f"Unknown FT color '{name}'") from exc
+
+    def description(self, name: str) -> str:
+        """Return the (cold) description of a palette entry."""
+
+        return self.metadata[name][1]
+
+    def snapshot(self) -> bytes:
+        """Serialize the parsed channels, keyed by the names and values they came from."""
+
+        return marshal.dumps(
+            (
+                SNAPSHOT_VERSION,
+                self.names,
+                self.values,
+                self.packed.tobytes(),
+                self.alpha.tobytes(),
+                self.srgb.tobytes(),
+                self.linear.tobytes(),
+            )
+        )
+
+    def _load_snapshot(self, snapshot: bytes) -> bool:
+        try:
+            version, names, values, packed, alpha, srgb, linear = marshal.loads(snapshot)
+        except (EOFError, ValueError, TypeError):
+            return False
+        if version != SNAPSHOT_VERSION or names != self.names or values != self.values:
+            return False
+        self.packed.frombytes(packed)
+        self.alpha.frombytes(alpha)
+        self.srgb.frombytes(srgb)
+        self.linear.frombytes(linear)
+        return True
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[bytes]:
+    """Return the stored snapshot bytes, or None when there is none."""
+
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def write_snapshot(store: Optional[PaletteStore] = None, path: Path = SNAPSHOT_PATH) -> Path:
+    """Store the parsed palette for the next import to load."""
+
+    from output import write_if_changed
+
+    write_if_changed(path, (store or PALETTE_STORE).snapshot())
+    return path
+
+
+PALETTE_STORE = PaletteStore(FT_COLOR_PALETTE, read_snapshot())
+
+
+def color_record(value: str) -> ColorRecord:
+    """Return the parsed record for a colour string, parsing it at most once."""
+
+    record = PALETTE_STORE.by_value.get(value)
+    if record is not None:
+        return record
+    return _parse_record(value)
+
+
+@memoize("color_record")
+def _parse_record(value: str) -> ColorRecord:
+    return ColorRecord(*parse_components(value))
+
+
+if __name__ == "__main__":
+    print(f"wrote {write_snapshot()}")
@@ -0,0 +1,189 @@
+"""Map truecolor values onto the xterm-256 and ANSI-16 palettes.
+
+For terminals (and mosh sessions) without 24-bit colour, tmux and fish
+themes can be written with ``--colors=256`` or ``--colors=16``. Every
+colour is replaced by the perceptually nearest (OKLab) entry of the stock
+xterm palette. Indices 16-255 are used for 256 colours, because the first
+16 follow the user's terminal theme; 0-15 with xterm's default values are
+used for 16 colours, with lightness down-weighted. Lookups go through a
+k-d ``ColorIndex`` per mode and are memoized per colour, so repeated
+colours across variants are one dict hit.
+
+Text colours are quantized against the backgrounds they are drawn on: if
+the nearest entry loses contrast (e.g. body text on paper falling to
+bright black on bright white in 16 colours), the nearest entry that keeps
+MIN_TEXT_CONTRAST, or the truecolor ratio if that was lower, is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from color_cache import memoize
+from color_index import ColorIndex
+from ghostty import contrast_ratio
+
+COLOR_MODES: Tuple[str, ...] = ("truecolor", "256", "16")
+
+# xterm's default values for the 16 ANSI colours.
+XTERM_ANSI: Tuple[str, ...] = (
+    "#000000",
+    "#cd0000",
+    "#00cd00",
+    "#cdcd00",
+    "#0000ee",
+    "#cd00cd",
+    "#00cdcd",
+    "#e5e5e5",
+    "#7f7f7f",
+    "#ff0000",
+    "#00ff00",
+    "#ffff00",
+    "#5c5cff",
+    "#ff00ff",
+    "#00ffff",
+    "#ffffff",
+)
+
+CUBE_VALUES = (0, 95, 135, 175, 215, 255)
+
+XTERM_256: Tuple[str, ...] = (
+    XTERM_ANSI
+    + tuple(
+        f"#{red:02x}{green:02x}{blue:02x}"
+        for red in CUBE_VALUES
+        for green in CUBE_VALUES
+        for blue in CUBE_VALUES
+    )
+    + tuple("#" + f"{8 + 10 * step:02x}" * 3 for step in range(24))
+)
+
+ANSI_NAMES: Tuple[str, ...] = (
+    "black",
+    "red",
+    "green",
+    "yellow",
+    "blue",
+    "magenta",
+    "cyan",
+    "white",
+)
+
+# Target-specific names for the 16 ANSI colours.
+TMUX_ANSI_NAMES: Tuple[str, ...] = ANSI_NAMES + tuple(f"bright{name}" for name in ANSI_NAMES)
+FISH_ANSI_NAMES: Tuple[str, ...] = ANSI_NAMES + tuple(f"br{name}" for name in ANSI_NAMES)
+
+# The 16 colours are far apart and vary between terminals, so in 16-colour
+# mode hue counts for more than lightness (teal maps to cyan, not grey).
+ANSI_LIGHTNESS_WEIGHT = 0.25
+
+# WCAG AA for normal text.
+MIN_TEXT_CONTRAST = 4.5
+
+# First palette index each mode may use.
+_MODE_OFFSETS: Dict[str, int] = {"256": 16, "16": 0}
+_INDEXES: Dict[str, ColorIndex] = {}
+
+
+def _index(mode: str) -> ColorIndex:
+    index = _INDEXES.get(mode)
+    if index is None:
+        if mode == "256":
+            index = ColorIndex(XTERM_256[16:])
+        elif mode == "16":
+            index = ColorIndex(XTERM_ANSI, lightness_weight=ANSI_LIGHTNESS_WEIGHT)
+        else:
+            raise ValueError(f"Unknown colour mode '{mode}' (expected 256 or 16)")
+        _INDEXES[mode] = index
+    return index
+
+
+@memoize("quantize")
+def quantize(color: str, mode: str) -> int:
+    """Return the xterm palette index nearest to a colour in the given mode."""
+
+    entry, _ = _index(mode).nearest(color)
+    return _MODE_OFFSETS[mode] + entry
+
+
+@memoize("quantize_text")
+def quantize_text(color: str, backgrounds: Tuple[str, ...], mode: str) -> int:
+    """Quantize a text colour without losing contrast against its backgrounds.
+
+    Each background is quantized too; the text must reach MIN_TEXT_CONTRAST
+    (or its truecolor ratio, if lower) against every one of them, or failing
+    that against the first.
+    """
+
+    index = _index(mode)
+    offset = _MODE_OFFSETS[mode]
+    targets = []
+    for background in backgrounds:
+        quantized = index.colors[quantize(background, mode) - offset]
+        targets.append((quantized, min(MIN_TEXT_CONTRAST, contrast_ratio(color, background))))
+
+    def readable(entry: int, required: Sequence[Tuple[str, float]]) -> bool:
+        return all(
+            contrast_ratio(index.colors[entry], background) >= needed
+            for background, needed in required
+        )
+
+    # The first background is the one the text is mostly drawn on; if no entry
+    # reads on all of them, settle for that one. Black or white always reaches
+    # 4.5:1 on it, so the second search always finds one.
+    found = index.nearest_matching(color, lambda entry: readable(entry, targets))
+    if found is None:
+        found = index.nearest_matching(color, lambda entry: readable(entry, targets[:1]))
+    entry, _ = found if found is not None else index.nearest(color)
+    return offset + entry
+
+
+def quantize_all(colors: Iterable[str], mode: str) -> List[int]:
+    """Quantize a batch of colours."""
+
+    return [quantize(color, mode) for color in colors]
+
+
+def parse_color_mode(argv: Sequence[str]) -> str:
+    """Parse a generator script's ``--colors=truecolor|256|16`` flag."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--colors", choices=COLOR_MODES, default="truecolor")
+    return parser.parse_args(argv).colors
+
+
+def _quantize_on(color: str, mode: str, on: Sequence[str]) -> int:
+    return quantize_text(color, tuple(on), mode) if on else quantize(color, mode)
+
+
+def tmux_color(color: str, mode: str = "truecolor", on: Sequence[str] = ()) -> str:
+    """Render a colour for tmux: hex, ``colourN`` or an ANSI colour name.
+
+    ``on`` lists the backgrounds a text colour is drawn on (see quantize_text).
+    """
+
+    if mode == "truecolor":
+        return color
+    index = _quantize_on(color, mode, on)
+    return f"colour{index}" if mode == "256" else TMUX_ANSI_NAMES[index]
+
+
+def fish_color(color: str, mode: str = "truecolor", on: Sequence[str] = ()) -> str:
+    """Render a colour for fish: hex, the xterm-256 entry's hex, or an ANSI name.
+
+    fish has no syntax for palette indices; given the exact hex of a cube or
+    ramp entry it picks that entry when downsampling to 256 colours. ``on``
+    lists the backgrounds a text colour is drawn on (see quantize_text).
+    """
+
+    if mode == "truecolor":
+        return color
+    index = _quantize_on(color, mode, on)
+    return XTERM_256[index] if mode == "256" else FISH_ANSI_NAMES[index]
+
+
+def output_suffix(mode: str) -> str:
+    """Return the theme file name suffix of a colour mode ("" for truecolor)."""
+
+    return "" if mode == "truecolor" else f"-{mode}"
@@ -0,0 +1,289 @@
+"""Resolved themes: every derived semantic colour of a theme, computed once.
+
+A ``ResolvedTheme`` holds the colours the generators share (surfaces,
+borders, status bar, accents, status colours, the ANSI palette, ...) with
+contrast already enforced. ``resolve_theme`` memoizes it per
+ThemeDefinition, so each target only maps roles onto its own keys and
+variant builds do the colour math once per theme. Tune shared roles here.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Tuple
+
+import color_space
+import palette_snap
+from color_cache import memoize
+from composite import palette_colors, theme_colors
+from ft_palette import ThemeDefinition
+from ghostty import (
+    ANSI_PALETTE_NAMES,
+    MIN_CONTRAST_RATIO,
+    ansi_palette,
+    contrast_ratio,
+    ensure_contrast,
+)
+
+# Palette entries behind the appearance-dependent roles.
+APPEARANCE_COLORS: Dict[str, Dict[str, str]] = {
+    "light": {
+        "status_bar": "black-10",
+        "divider": "black-20",
+        "menu_selected": "black-20",
+        "panel": "paper-dim",
+        "ribbon": "black-20",
+        "line_highlight": "wheat",
+        "find_highlight": "sky",
+        "shell_selection": "oxford-40",
+        "pane_border": "black-50",
+        "pane_border_inactive": "black-30",
+        "accent": "teal",
+    },
+    "dark": {
+        "status_bar": "black-90",
+        "divider": "black-70",
+        "menu_selected": "black-70",
+        "panel": "slate-dim",
+        "ribbon": "black-90",
+        "line_highlight": "black-80",
+        "find_highlight": "oxford-40",
+        "shell_selection": "jade",
+        "pane_border": "black-30",
+        "pane_border_inactive": "black-60",
+        "accent": "teal-100",
+    },
+}
+
+# Palette entries used directly by appearance-independent roles.
+NAMED_COLORS: Tuple[str, ...] = (
+    "teal",
+    "muted-inverse-text",
+    "crimson",
+    "jade",
+    "mandarin",
+    "oxford",
+    "claret",
+    "black-40",
+)
+
+# Surface roles and how far each is mixed from the background toward white
+# (dark themes) or black (light themes), in OKLab.
+SURFACE_MIX: Dict[str, float] = {
+    "surface": 0.04,
+    "border": 0.15,
+    "border_variant": 0.10,
+    "element": 0.05,
+    "element_hover": 0.10,
+    "element_active": 0.20,
+    "scrollbar_thumb": 0.3,
+}
+
+# Status colours on dark backgrounds are brightened past the palette for WCAG AA.
+DARK_ERROR = "#ff6666"  # 5.03:1 on slate
+DARK_SUCCESS = "#66cc99"  # 7.30:1 on slate
+
+
+@dataclass(frozen=True)
+class ResolvedTheme:
+    """Derived colours of a theme, all ``#rrggbb``."""
+
+    theme: ThemeDefinition
+    background: str
+    foreground: str
+    comment: str
+    selection: str
+    # Surfaces mixed from the background toward white (dark) or black (light)
+    surface: str
+    border: str
+    border_variant: str
+    element: str
+    element_hover: str
+    element_active: str
+    scrollbar_thumb: str
+    # Chrome
+    status_bar: str
+    divider: str
+    menu_selected: str
+    panel: str
+    ribbon: str
+    line_highlight: str
+    gutter_foreground: str
+    find_highlight: str
+    shell_selection: str
+    pane_border: str
+    pane_border_inactive: str
+    # Text and accents with contrast enforced against their backgrounds
+    accent: str
+    accent_base: str
+    accent_on_background: str
+    accent_on_status: str
+    comment_on_background: str
+    comment_on_status: str
+    selection_text: str
+    ribbon_text: str
+    # Status
+    error: str
+    success: str
+    warning: str
+    diff_added: str
+    diff_modified: str
+    diff_deleted: str
+    # Terminal
+    ansi: Tuple[str, ...]
+    ansi_dim: Tuple[str, ...]
+    terminal_accent_text: str
+    terminal_frame: str
+    terminal_highlight: str
+
+    @property
+    def slug(self) -> str:
+        return self.theme.slug
+
+    @property
+    def appearance(self) -> str:
+        return self.theme.appearance
+
+    @property
+    def is_dark(self) -> bool:
+        return self.theme.is_dark
+
+    def ansi_color(self, name: str) -> str:
+        """Return the ANSI palette colour that replaces the named FT entry."""
+
+        return self.ansi[ANSI_PALETTE_NAMES.index(name)]
+
+
+# Roles taken straight from the theme or solved elsewhere; never snapped.
+UNSNAPPED_ROLES = frozenset({"theme", "background", "foreground", "comment", "selection", "ansi"})
+
+# Roles with contrast enforced, and the role they must contrast with.
+CONTRAST_ROLES: Dict[str, str] = {
+    "pane_border": "background",
+    "accent_on_background": "background",
+    "accent_on_status": "status_bar",
+    "comment_on_background": "background",
+    "comment_on_status": "status_bar",
+    "selection_text": "selection",
+    "ribbon_text": "ribbon",
+    "terminal_frame": "background",
+    "terminal_highlight": "background",
+}
+
+
+def snap_roles(resolved: ResolvedTheme, tolerance: float) -> ResolvedTheme:
+    """Replace derived colours within ``tolerance`` of a palette swatch by the swatch.
+
+    Contrast-enforced roles only snap when the swatch reaches
+    MIN_CONTRAST_RATIO (or the original's ratio, if that was lower). Every
+    snap is recorded with ``palette_snap``.
+    """
+
+    changes: Dict[str, object] = {}
+
+    def snapped(role: str, color: str) -> str:
+        name, swatch, distance = palette_snap.nearest_swatch(color)
+        if swatch == color or distance > tolerance:
+            return color
+        against = CONTRAST_ROLES.get(role)
+        if against is not None:
+            background = getattr(resolved, against)
+            needed = min(MIN_CONTRAST_RATIO, contrast_ratio(color, background))
+            if contrast_ratio(swatch, background) < needed:
+                return color
+        palette_snap.record(
+            palette_snap.Snap(resolved.slug, role, color, name, swatch, distance)
+        )
+        return swatch
+
+    for field in fields(ResolvedTheme):
+        if field.name in UNSNAPPED_ROLES:
+            continue
+        value = getattr(resolved, field.name)
+        if isinstance(value, tuple):
+            new = tuple(snapped(f"{field.name}.{i}", color) for i, color in enumerate(value))
+        else:
+            new = snapped(field.name, value)
+        if new != value:
+            changes[field.name] = new
+    return replace(resolved, **changes) if changes else resolved
+
+
+@memoize("resolved_theme", maxsize=256)
+def resolve_theme(theme: ThemeDefinition) -> ResolvedTheme:
+    """Compute every derived colour of a theme, snapped when palette_snap is enabled."""
+
+    resolved = _resolve(theme)
+    if palette_snap.ENABLED:
+        resolved = snap_roles(resolved, palette_snap.TOLERANCE)
+    return resolved
+
+
+def _resolve(theme: ThemeDefinition) -> ResolvedTheme:
+    """Resolve a theme's roles before snapping."""
+
+    # Palette entries may be translucent; flatten them over the background.
+    background, foreground, comment, selection = theme_colors(theme)
+    names = APPEARANCE_COLORS[theme.appearance]
+    role = dict(zip(names, palette_colors(names.values(), background)))
+    named = dict(zip(NAMED_COLORS, palette_colors(NAMED_COLORS, background)))
+
+    blend_target = "#ffffff" if theme.is_dark else "#000000"
+    surfaces = dict(
+        zip(
+            SURFACE_MIX,
+            color_space.mix(background, blend_target, tuple(SURFACE_MIX.values())),
+        )
+    )
+
+    teal = named["teal"]
+    ansi = ansi_palette(theme)
+    terminal_accent = ansi[ANSI_PALETTE_NAMES.index("teal")]
+    terminal_warning = ansi[ANSI_PALETTE_NAMES.index("mandarin")]
+
+    return ResolvedTheme(
+        theme=theme,
+        background=background,
+        foreground=foreground,
+        comment=comment,
+        selection=selection,
+        **surfaces,
+        status_bar=role["status_bar"],
+        divider=role["divider"],
+        menu_selected=role["menu_selected"],
+        panel=role["panel"],
+        ribbon=role["ribbon"],
+        line_highlight=role["line_highlight"],
+        gutter_foreground=(
+            named["muted-inverse-text"] if theme.is_dark else comment
+        ),
+        find_highlight=role["find_highlight"],
+        shell_selection=role["shell_selection"],
+        # The active border must read against the background; the inactive one
+        # is intentionally subtle and left as is.
+        pane_border=ensure_contrast(role["pane_border"], background, foreground),
+        pane_border_inactive=role["pane_border_inactive"],
+        accent=role["accent"],
+        accent_base=teal,
+        accent_on_background=ensure_contrast(teal, background, foreground),
+        accent_on_status=ensure_contrast(teal, role["status_bar"], foreground),
+        comment_on_background=ensure_contrast(comment, background, foreground),
+        comment_on_status=ensure_contrast(comment, role["status_bar"], foreground),
+        selection_text=ensure_contrast(foreground, selection, background),
+        ribbon_text=ensure_contrast(foreground, role["ribbon"], background),
+        error=DARK_ERROR if theme.is_dark else named["crimson"],
+        success=DARK_SUCCESS if theme.is_dark else named["jade"],
+        warning=named["mandarin"],
+        diff_added=named["jade"],
+        diff_modified=named["oxford"],
+        diff_deleted=named["claret"],
+        ansi=ansi,
+        ansi_dim=(
+            named["black-40"],
+            *color_space.mix(ansi[1:7], background, 0.3),
+            comment,
+        ),
+        terminal_accent_text=ensure_contrast(background, terminal_accent, foreground),
+        terminal_frame=ensure_contrast(terminal_accent, background, foreground),
+        terminal_highlight=ensure_contrast(terminal_warning, background, foreground),
+    )
@@ -6,40 +6,27 @@ import json
 from pathlib import Path
 from typing import Iterable, List
 
+import instrument
 from ft_palette import (
     INVERSE_THEME,
     STANDARD_THEME,
     ThemeDefinition,
-    get_color,
 )
+from output import write_if_changed
+from resolved_theme import resolve_theme
 
 
 def build_color_scheme(theme: ThemeDefinition) -> dict:
     """Return the Sublime Text color scheme payload for a given FT theme."""
 
-    background = theme.background.hex_value
-    foreground = theme.body_text.hex_value
-    selection = theme.selection.hex_value
-    comment = theme.comment_text.hex_value
-
-    # Colors for git diff indicators
-    jade = get_color("jade").hex_value
-    oxford = get_color("oxford").hex_value
-    claret = get_color("claret").hex_value
-    teal = get_color("teal").hex_value
-
-    if theme.slug == "inverse":
-        line_highlight = get_color("black-80").hex_value
-        gutter_fg = get_color("muted-inverse-text").hex_value
-        find_highlight = get_color("oxford-40").hex_value
-        guide_color = get_color("black-70").hex_value
-        code_background = get_color("black-80").hex_value
-    else:
-        line_highlight = get_color("wheat").hex_value
-        gutter_fg = comment
-        find_highlight = get_color("sky").hex_value
-        guide_color = get_color("black-20").hex_value
-        code_background = get_color("wheat").hex_value
+    resolved = resolve_theme(theme)
+    background = resolved.background
+    foreground = resolved.foreground
+    selection = resolved.selection
+    comment = resolved.comment
+    line_highlight = resolved.line_highlight
+    code_background = resolved.line_highlight
+    guide_color = resolved.divider
 
     return {
         "name": f"Financial Times {theme.slug.title()}",
@@ -59,12 +46,12 @@ def build_color_scheme(theme: ThemeDefinition) -> dict:
             "selection": "var(selection)",
             "selection_border": "var(selection)",
             "inactive_selection": "var(selection)",
-            "misspelling": claret,
+            "misspelling": resolved.diff_deleted,
             "shadow": background,
-            "active_guide": teal,
+            "active_guide": resolved.accent_base,
             "stack_guide": guide_color,
             "guide": guide_color,
-            "find_highlight": find_highlight,
+            "find_highlight": resolved.find_highlight,
             "find_highlight_foreground": foreground,
             "brackets_foreground": "var(foreground)",
             "brackets_options": "underline",
@@ -73,12 +60,12 @@ def build_color_scheme(theme: ThemeDefinition) -> dict:
             "tags_foreground": "var(foreground)",
             "tags_options": "stippled_underline",
             "gutter": "var(background)",
-            "gutter_foreground": gutter_fg,
+            "gutter_foreground": resolved.gutter_foreground,
             "gutter_foreground_highlight": "var(foreground)",
-            "line_diff_added": jade,
-            "line_diff_modified": oxford,
-            "line_diff_deleted": claret,
-            "accent": teal,
+            "line_diff_added": resolved.diff_added,
+            "line_diff_modified": resolved.diff_modified,
+            "line_diff_deleted": resolved.diff_deleted,
+            "accent": resolved.accent_base,
             "popup_css": f"html {{ background-color: {background}; color: {foreground}; }}",
         },
         "rules": [
@@ -129,20 +116,26 @@ def build_color_scheme(theme: ThemeDefinition) -> dict:
 def write_color_scheme(theme: ThemeDefinition, out_dir: Path) -> Path:
     """Write a Sublime Text color scheme file and return its path."""
 
-    payload = build_color_scheme(theme)
+    with instrument.span("sublime", "payload"):
+        payload = build_color_scheme(theme)
+    with instrument.span("sublime", "serialize"):
+        text = json.dumps(payload, indent=2) + "\n"
     out_dir.mkdir(parents=True, exist_ok=True)
     file_path = out_dir / f"Financial Times {theme.slug.title()}.sublime-color-scheme"
-    file_path.write_text(json.dumps(payload, indent=2) + "\n")
+    with instrument.span("sublime", "write"):
+        write_if_changed(file_path, text)
     return file_path
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/sublime"),
+) -> None:
     """Generate Sublime Text themes for the provided FT theme set."""
 
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    out_dir = Path("build/sublime")
     written: List[Path] = []
     for theme in themes:
         path = write_color_scheme(theme, out_dir)
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 from typing import Iterable, List
 
-from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
-from ghostty import ensure_contrast, MIN_CONTRAST_RATIO
+import instrument
+from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition
+from output import write_if_changed
+from quantize import output_suffix, parse_color_mode, tmux_color
+from resolved_theme import resolve_theme
 
 
 def trim_hash(value: str) -> str:
@@ -15,52 +19,48 @@ def trim_hash(value: str) -> str:
     return value.lstrip("#")
 
 
-def build_theme_lines(theme: ThemeDefinition) -> List[str]:
-    """Compose the tmux config lines for a given theme."""
+def build_theme_lines(theme: ThemeDefinition, colors: str = "truecolor") -> List[str]:
+    """Compose the tmux config lines for a given theme.
 
-    background = theme.background.hex_value
-    foreground = theme.body_text.hex_value
-    selection = theme.selection.hex_value
-    comment = theme.comment_text.hex_value
+    ``colors`` is "truecolor" (hex), "256" or "16" (nearest xterm colours);
+    text colours are quantized against the backgrounds they are drawn on.
+    """
+
+    resolved = resolve_theme(theme)
+
+    def color(value: str, *on: str) -> str:
+        return tmux_color(value, colors, on)
+
+    background = color(resolved.background)
+    foreground = color(
+        resolved.foreground,
+        resolved.background,
+        resolved.status_bar,
+        resolved.selection,
+        resolved.menu_selected,
+    )
+    selection = color(resolved.selection)
 
     # Keep the palette choice available, but do not apply inactive backgrounds.
-    if theme.slug == "standard":
-        inactive_bg = get_color("paper-dim").hex_value  # #faece0
-        status_bg = get_color("black-10").hex_value  # #e6d9ce
-        menu_selected_bg = get_color("black-20").hex_value  # #ccc1b7
-    else:
-        inactive_bg = get_color("slate-dim").hex_value  # #21252d
-        status_bg = get_color("black-90").hex_value  # #1a1817
-        menu_selected_bg = get_color("black-70").hex_value  # #4d4845
-
-    # Accent color for active elements
-    accent_raw = get_color("teal").hex_value  # #0d7680
-
-    # Pane border colors: foreground for active, subtle palette shade for inactive
-    if theme.slug == "standard":
-        active_border = get_color("black-50").hex_value  # #807973
-        inactive_border_raw = get_color("black-30").hex_value  # #b3a9a0
-    else:
-        active_border = get_color("black-30").hex_value  # #b3a9a0
-        inactive_border_raw = get_color("black-60").hex_value  # #66605c
-
-    # Ensure contrast for colors used against the status bar background
-    comment_on_status = ensure_contrast(comment, status_bg, foreground)
-    accent_on_status = ensure_contrast(accent_raw, status_bg, foreground)
-
-    # Ensure contrast for colors used against the terminal background
-    comment_on_bg = ensure_contrast(comment, background, foreground)
-    accent_on_bg = ensure_contrast(accent_raw, background, foreground)
-
-    # Ensure active pane border has sufficient contrast against the background;
-    # inactive border is intentionally subtle, so skip the contrast check.
-    active_border_on_bg = ensure_contrast(active_border, background, foreground)
+    inactive_bg = color(resolved.panel)
+    status_bg = color(resolved.status_bar)
+    menu_selected_bg = color(resolved.menu_selected)
+
+    # Contrast-corrected text and accents for the status bar and the terminal
+    comment_on_status = color(resolved.comment_on_status, resolved.status_bar)
+    accent_on_status = color(resolved.accent_on_status, resolved.status_bar)
+    comment_on_bg = color(resolved.comment_on_background, resolved.background)
+    accent_on_bg = color(resolved.accent_on_background, resolved.background)
+
+    active_border_on_bg = color(resolved.pane_border)
+    inactive_border_raw = color(resolved.pane_border_inactive)
 
+    name = f"financial-times-{theme.slug}{output_suffix(colors)}"
     lines = [
         f"# Financial Times {theme.slug.title()} (tmux)",
         "#",
         "# Usage: Add to your ~/.tmux.conf or source this file:",
-        f"#   source-file ~/.config/tmux/financial-times-{theme.slug}.conf",
+        f"#   source-file ~/.config/tmux/{name}.conf",
         "",
         "# Terminal background and foreground",
         f"# Inactive background palette choice retained: {inactive_bg}",
@@ -116,27 +116,34 @@ def build_theme_lines(theme: ThemeDefinition) -> List[str]:
     return lines
 
 
-def write_theme(theme: ThemeDefinition, out_dir: Path) -> Path:
+def write_theme(theme: ThemeDefinition, out_dir: Path, colors: str = "truecolor") -> Path:
     """Write a tmux theme file for the given theme object."""
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    lines = build_theme_lines(theme)
-    path = out_dir / f"financial-times-{theme.slug}.conf"
-    path.write_text("\n".join(lines) + "\n")
+    with instrument.span("tmux", "payload"):
+        lines = build_theme_lines(theme, colors)
+    with instrument.span("tmux", "serialize"):
+        text = "\n".join(lines) + "\n"
+    path = out_dir / f"financial-times-{theme.slug}{output_suffix(colors)}.conf"
+    with instrument.span("tmux", "write"):
+        write_if_changed(path, text)
     return path
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/tmux"),
+    colors: str = "truecolor",
+) -> None:
     """Generate tmux themes for all configured FT variants."""
 
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    out_dir = Path("build/tmux")
     for theme in themes:
-        path = write_theme(theme, out_dir)
+        path = write_theme(theme, out_dir, colors)
         print(f"wrote {path}")
 
 
 if __name__ == "__main__":
-    main()
+    main(colors=parse_color_mode(sys.argv[1:]))
@@ -0,0 +1,237 @@
+"""Enumerate WCAG-compliant theme variants and build them in bulk.
+
+Candidate palette entries for each ThemeDefinition role are combined and
+filtered against the cached contrast matrix, pruning per background and per
+body text before the inner loops, so tens of thousands of combinations are
+checked with table lookups. Surviving variants are then run through the
+generators on a process pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import fish_theme
+import ghostty
+import sublime
+import tmux
+import vscode
+import zed_theme
+import zellij
+from contrast_matrix import WCAG_AA_NORMAL, ContrastMatrix, contrast_matrix
+from ft_palette import ThemeDefinition, get_color
+from palette_store import PALETTE_STORE
+
+VARIANT_OUT_DIR = Path("build/variants")
+
+# Backgrounds darker than this relative luminance get a dark appearance.
+DARK_LUMINANCE = 0.2
+
+VARIANT_TARGETS: Dict[str, Callable[[Sequence[ThemeDefinition], Path], object]] = {
+    "vscode": vscode.main,
+    "zed": zed_theme.main,
+    "ghostty": ghostty.main,
+    "fish": fish_theme.main,
+    "sublime": sublime.main,
+    "tmux": tmux.main,
+    "zellij": zellij.main,
+}
+
+
+@dataclass(frozen=True)
+class VariantCandidates:
+    """Palette entry names to try for each ThemeDefinition role."""
+
+    backgrounds: Tuple[str, ...]
+    body_texts: Tuple[str, ...]
+    comment_texts: Tuple[str, ...]
+    selections: Tuple[str, ...]
+
+    @property
+    def combinations(self) -> int:
+        """Return the number of combinations before filtering."""
+
+        return (
+            len(self.backgrounds)
+            * len(self.body_texts)
+            * len(self.comment_texts)
+            * len(self.selections)
+        )
+
+
+def opaque_palette_names() -> Tuple[str, ...]:
+    """Return every palette entry without transparency."""
+
+    return tuple(
+        name
+        for name, alpha in zip(PALETTE_STORE.names, PALETTE_STORE.alpha)
+        if alpha >= 1.0
+    )
+
+
+def variant_slug(background: str, body: str, comment: str, selection: str) -> str:
+    """Return the slug used for a variant's output names."""
+
+    return "--".join((background, body, comment, selection))
+
+
+def enumerate_variants(
+    candidates: VariantCandidates,
+    min_text_ratio: float = WCAG_AA_NORMAL,
+    min_selection_ratio: float = WCAG_AA_NORMAL,
+    matrix: Optional[ContrastMatrix] = None,
+) -> Iterator[ThemeDefinition]:
+    """Yield every candidate combination that meets the contrast requirements.
+
+    Body and comment text must reach ``min_text_ratio`` against the
+    background, body text must reach ``min_selection_ratio`` against the
+    selection, comments must differ from body text and the selection from
+    the background.
+    """
+
+    matrix = contrast_matrix() if matrix is None else matrix
+    index = PALETTE_STORE.index
+    rows = matrix.rows
+    bodies = [(name, index[name]) for name in candidates.body_texts]
+    comments = [(name, index[name]) for name in candidates.comment_texts]
+    selections = [(name, index[name]) for name in candidates.selections]
+
+    for background in candidates.backgrounds:
+        bg_index = index[background]
+        bg_row = rows[bg_index]
+        appearance = (
+            "dark" if matrix.luminance[bg_index] < DARK_LUMINANCE else "light"
+        )
+        readable_bodies = [item for item in bodies if bg_row[item[1]] >= min_text_ratio]
+        readable_comments = [
+            name for name, i in comments if bg_row[i] >= min_text_ratio
+        ]
+        usable_selections = [item for item in selections if item[0] != background]
+        for body, body_index in readable_bodies:
+            body_row = rows[body_index]
+            body_selections = [
+                name
+                for name, i in usable_selections
+                if body_row[i] >= min_selection_ratio
+            ]
+            if not body_selections:
+                continue
+            for comment in readable_comments:
+                if comment == body:
+                    continue
+                for selection in body_selections:
+                    yield ThemeDefinition(
+                        slug=variant_slug(background, body, comment, selection),
+                        background=get_color(background),
+                        body_text=get_color(body),
+                        comment_text=get_color(comment),
+                        selection=get_color(selection),
+                        appearance=appearance,
+                    )
+
+
+def build_variant(
+    theme: ThemeDefinition, out_root: Path, targets: Sequence[str]
+) -> str:
+    """Run the selected generators for one variant into ``out_root/<slug>``."""
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for target in targets:
+            VARIANT_TARGETS[target]((theme,), out_root / theme.slug / target)
+    return theme.slug
+
+
+def build_variants(
+    variants: Sequence[ThemeDefinition],
+    out_root: Path = VARIANT_OUT_DIR,
+    targets: Sequence[str] = tuple(VARIANT_TARGETS),
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """Build every variant on a process pool and return the slugs written."""
+
+    unknown = set(targets) - set(VARIANT_TARGETS)
+    if unknown:
+        raise ValueError(f"Unknown build target(s): {', '.join(sorted(unknown))}")
+    if not variants:
+        return []
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(variants) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                build_variant,
+                variants,
+                [out_root] * len(variants),
+                [tuple(targets)] * len(variants),
+                chunksize=chunksize,
+            )
+        )
+
+
+def parse_names(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated list of palette names; ``all`` means every opaque entry."""
+
+    if value == "all":
+        return opaque_palette_names()
+    names = tuple(name.strip() for name in value.split(",") if name.strip())
+    for name in names:
+        get_color(name)
+    return names
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Enumerate compliant variants from candidate lists and optionally build them."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backgrounds", required=True, type=parse_names)
+    parser.add_argument("--body", required=True, type=parse_names)
+    parser.add_argument("--comment", required=True, type=parse_names)
+    parser.add_argument("--selection", required=True, type=parse_names)
+    parser.add_argument("--min-ratio", type=float, default=WCAG_AA_NORMAL)
+    parser.add_argument(
+        "--targets",
+        type=lambda value: tuple(value.split(",")),
+        default=tuple(VARIANT_TARGETS),
+        help="comma-separated generators to run (default: all)",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="build at most N variants")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--out-dir", type=Path, default=VARIANT_OUT_DIR)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count the compliant variants",
+    )
+    args = parser.parse_args(argv)
+
+    candidates = VariantCandidates(args.backgrounds, args.body, args.comment, args.selection)
+    start = time.perf_counter()
+    variants = list(
+        enumerate_variants(candidates, args.min_ratio, args.min_ratio)
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(variants)} of {candidates.combinations} combinations pass "
+        f"({elapsed * 1000:.1f} ms)"
+    )
+    if args.limit is not None:
+        variants = variants[: args.limit]
+    if args.dry_run or not variants:
+        return
+
+    start = time.perf_counter()
+    build_variants(variants, args.out_dir, args.targets, args.jobs)
+    elapsed = time.perf_counter() - start
+    print(f"built {len(variants)} variant(s) into {args.out_dir} ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import io
 import json
+import zipfile
 from pathlib import Path
-from typing import Iterable, List, Tuple
-import subprocess
+from typing import Dict, Iterable, List
 
-from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
+import instrument
+from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition
+from output import write_if_changed
+from resolved_theme import resolve_theme
 
 PACKAGE_METADATA = {
     "name": "financial-times-theme",
@@ -20,22 +24,26 @@ PACKAGE_METADATA = {
     "categories": ["Themes"],
 }
 
+CONTENT_TYPES_XML = """<?xml version="1.0" encoding="utf-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"><Default Extension=".json" ContentType="application/json" /><Default Extension=".vsixmanifest" ContentType="text/xml" /></Types>
+"""
+
+# Fixed zip entry timestamp (the earliest the format allows) for reproducible packages.
+VSIX_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
 
 def build_theme_payload(theme: ThemeDefinition) -> dict:
     """Return the VSCode theme JSON payload for a given FT theme."""
 
-    background = theme.background.hex_value
-    foreground = theme.body_text.hex_value
-    selection = theme.selection.hex_value
-    comment = theme.comment_text.hex_value
+    resolved = resolve_theme(theme)
+    background = resolved.background
+    foreground = resolved.foreground
+    selection = resolved.selection
+    comment = resolved.comment
 
-    # Use a subtler, muted color for the status bar to reduce visual prominence
-    if theme.slug == "standard":
-        status_bar_bg = get_color("black-10").hex_value  # #e6d9ce - muted with good contrast
-        border = get_color("black-20").hex_value  # #ccc1b7 - visible against paper
-    else:
-        status_bar_bg = get_color("black-90").hex_value  # #1a1817 - subtle contrast for inverse
-        border = get_color("black-70").hex_value  # #4d4845 - visible against slate
+    # A subtler, muted status bar reduces visual prominence
+    status_bar_bg = resolved.status_bar
+    border = resolved.divider
 
     colors = {
         "editor.background": background,
@@ -79,81 +87,200 @@ def build_theme_payload(theme: ThemeDefinition) -> dict:
     return {
         "$schema": "vscode://schemas/color-theme",
         "name": f"Financial Times {theme.slug.title()}",
-        "type": "dark" if theme.slug == "inverse" else "light",
+        "type": theme.appearance,
         "colors": colors,
         "tokenColors": token_colors,
     }
 
 
+def theme_file_name(theme: ThemeDefinition) -> str:
+    """Return the file name of a theme inside the extension."""
+
+    return f"ft-{theme.slug}.json"
+
+
+def render_theme(theme: ThemeDefinition) -> str:
+    """Return the serialized VSCode theme JSON for a given FT theme."""
+
+    with instrument.span("vscode", "payload"):
+        payload = build_theme_payload(theme)
+    with instrument.span("vscode", "serialize"):
+        return json.dumps(payload, indent=2) + "\n"
+
+
 def write_theme(theme: ThemeDefinition, out_dir: Path) -> Path:
     """Write a VSCode theme JSON file and return its path."""
 
-    payload = build_theme_payload(theme)
+    text = render_theme(theme)
     out_dir.mkdir(parents=True, exist_ok=True)
-    file_path = out_dir / f"ft-{theme.slug}.json"
-    file_path.write_text(json.dumps(payload, indent=2) + "\n")
+    file_path = out_dir / theme_file_name(theme)
+    with instrument.span("vscode", "write"):
+        write_if_changed(file_path, text)
     return file_path
 
 
-def write_package_json(theme_entries: List[Tuple[ThemeDefinition, Path]], out_dir: Path) -> Path:
-    """Emit the VSCode extension manifest pointing at our theme files."""
+def render_package_json(themes: Iterable[ThemeDefinition]) -> str:
+    """Return the serialized extension manifest pointing at our theme files."""
 
-    themes = []
-    for theme, path in theme_entries:
-        ui_theme = "vs-dark" if theme.slug == "inverse" else "vs"
-        themes.append(
+    contributed = []
+    for theme in themes:
+        ui_theme = "vs-dark" if theme.is_dark else "vs"
+        contributed.append(
             {
                 "label": f"Financial Times {theme.slug.title()}",
                 "uiTheme": ui_theme,
-                "path": f"./{path.name}",
+                "path": f"./{theme_file_name(theme)}",
             }
         )
 
     manifest = dict(PACKAGE_METADATA)
     manifest["scripts"] = {
         "build": "python3 ../../vscode.py",
-        "package": "npx @vscode/vsce package",
+        "package": "python3 ../../vscode.py",
     }
-    manifest["contributes"] = {"themes": themes}
+    manifest["contributes"] = {"themes": contributed}
+    with instrument.span("vscode", "serialize"):
+        return json.dumps(manifest, indent=2) + "\n"
+
+
+def write_package_json(themes: Iterable[ThemeDefinition], out_dir: Path) -> Path:
+    """Emit the VSCode extension manifest pointing at our theme files."""
+
+    text = render_package_json(themes)
     manifest_path = out_dir / "package.json"
-    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n")
+    with instrument.span("vscode", "write"):
+        write_if_changed(manifest_path, text)
     return manifest_path
 
 
-def run_vsce_package(out_dir: Path) -> None:
-    """Invoke vsce package within the generated theme directory."""
+def read_extension_files(themes: Iterable[ThemeDefinition], out_dir: Path) -> Dict[str, str]:
+    """Return the extension payload (file name -> contents) ``write_extension`` left in out_dir."""
+
+    names = [theme_file_name(theme) for theme in themes] + ["package.json"]
+    return {name: (out_dir / name).read_text(encoding="utf-8") for name in names}
+
 
-    result = subprocess.run(
-        ["npx", "@vscode/vsce", "package"],
-        cwd=str(out_dir),
-        capture_output=True,
-        text=True,
-        check=False,
+def escape(text: str) -> str:
+    """Escape text for XML content and double-quoted attributes.
+
+    Covers ``&``, ``<``, ``>`` and ``"`` (xml.sax.saxutils is slow to import).
+    """
+
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
     )
-    print(result.stdout.strip())
-    if result.stderr:
-        print(result.stderr.strip())
-    if result.returncode != 0:
-        raise SystemExit(result.returncode)
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
-    """Generate VSCode themes for the provided FT theme set."""
+def vsix_manifest() -> str:
+    """Return the extension.vsixmanifest describing the package."""
 
-    if themes is None:
-        themes = (STANDARD_THEME, INVERSE_THEME)
+    meta = {key: escape(str(value)) for key, value in PACKAGE_METADATA.items()}
+    engine = escape(PACKAGE_METADATA["engines"]["vscode"])
+    categories = escape(",".join(PACKAGE_METADATA["categories"]))
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<PackageManifest Version="2.0.0" xmlns="http://schemas.microsoft.com/developer/vsx-schema/2011" xmlns:d="http://schemas.microsoft.com/developer/vsx-schema-design/2011">
+  <Metadata>
+    <Identity Language="en-US" Id="{meta['name']}" Version="{meta['version']}" Publisher="{meta['publisher']}" />
+    <DisplayName>{meta['displayName']}</DisplayName>
+    <Description xml:space="preserve">{meta['description']}</Description>
+    <Tags>theme,color-theme</Tags>
+    <Categories>{categories}</Categories>
+    <GalleryFlags>Public</GalleryFlags>
+    <Properties>
+      <Property Id="Microsoft.VisualStudio.Code.Engine" Value="{engine}" />
+      <Property Id="Microsoft.VisualStudio.Code.ExtensionDependencies" Value="" />
+      <Property Id="Microsoft.VisualStudio.Code.ExtensionPack" Value="" />
+      <Property Id="Microsoft.VisualStudio.Code.ExtensionKind" Value="ui,workspace" />
+      <Property Id="Microsoft.VisualStudio.Code.LocalizedLanguages" Value="" />
+      <Property Id="Microsoft.VisualStudio.Services.GitHubFlavoredMarkdown" Value="true" />
+      <Property Id="Microsoft.VisualStudio.Services.Content.Pricing" Value="Free" />
+    </Properties>
+  </Metadata>
+  <Installation>
+    <InstallationTarget Id="Microsoft.VisualStudio.Code" />
+  </Installation>
+  <Dependencies />
+  <Assets>
+    <Asset Type="Microsoft.VisualStudio.Code.Manifest" Path="extension/package.json" Addressable="true" />
+  </Assets>
+</PackageManifest>
+"""
 
-    out_dir = Path("build/vscode")
-    written: List[Tuple[ThemeDefinition, Path]] = []
+
+def vsix_path(out_dir: Path) -> Path:
+    """Return where the packaged extension is written."""
+
+    return out_dir / f"{PACKAGE_METADATA['name']}-{PACKAGE_METADATA['version']}.vsix"
+
+
+def write_vsix(files: Dict[str, str], out_dir: Path) -> Path:
+    """Package the extension payload as a .vsix (an OPC zip) without vsce.
+
+    Entries are written in a fixed order with a fixed timestamp and mode, so
+    identical inputs produce byte-identical packages and an unchanged
+    package is not rewritten.
+    """
+
+    entries = {
+        "[Content_Types].xml": CONTENT_TYPES_XML,
+        "extension.vsixmanifest": vsix_manifest(),
+    }
+    for name in sorted(files):
+        entries[f"extension/{name}"] = files[name]
+
+    path = vsix_path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with instrument.span("vscode", "package"):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, text in entries.items():
+                info = zipfile.ZipInfo(name, date_time=VSIX_TIMESTAMP)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, text.encode("utf-8"))
+    with instrument.span("vscode", "write"):
+        write_if_changed(path, buffer.getvalue())
+    return path
+
+
+def package_extension(themes: Iterable[ThemeDefinition], out_dir: Path) -> Path:
+    """Package the files ``write_extension`` wrote to out_dir as a .vsix."""
+
+    path = write_vsix(read_extension_files(themes, out_dir), out_dir)
+    print(f"wrote {path}")
+    return path
+
+
+def write_extension(themes: Iterable[ThemeDefinition], out_dir: Path) -> List[Path]:
+    """Write the theme files and extension manifest, returning their paths."""
+
+    themes = tuple(themes)
+    written: List[Path] = []
     for theme in themes:
         path = write_theme(theme, out_dir)
-        written.append((theme, path))
+        written.append(path)
         print(f"wrote {path}")
 
-    manifest = write_package_json(written, out_dir)
+    manifest = write_package_json(themes, out_dir)
     print(f"wrote {manifest}")
+    return written + [manifest]
+
+
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/vscode"),
+) -> None:
+    """Generate VSCode themes for the provided FT theme set."""
+
+    if themes is None:
+        themes = (STANDARD_THEME, INVERSE_THEME)
 
-    run_vsce_package(out_dir)
+    themes = tuple(themes)
+    write_extension(themes, out_dir)
+    package_extension(themes, out_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+"""Watch the palette and generator sources and rebuild affected targets.
+
+The generators stay imported between rebuilds. When a source file changes,
+only that module and the modules importing it are reloaded, and only the
+targets whose sources include it are rebuilt. Changes are detected by
+polling modification times, which needs nothing beyond the standard library.
+
+Edits that only touch palette values are narrowed further with the
+dependency map from ``deps``: the changed entries are reported with the
+output keys they feed, and targets none of those keys belong to are skipped.
+Narrowing is per target; a rebuilt target is regenerated whole, and
+unchanged files are left alone by ``output``. Probing the map takes seconds,
+so it is refreshed by a separate process after every change. It is only used
+while its key matches the current sources, since which keys read which
+entries moves with the values themselves; until a matching map is ready,
+palette edits rebuild every target that imports the palette.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import build
+import build_cache
+import color_cache
+import deps
+import output
+from ft_palette import ThemeDefinition
+
+PALETTE_MODULE = "ft_palette"
+
+DEFAULT_INTERVAL = 0.2
+
+
+def watched_files() -> List[Path]:
+    """Return every repository module a build target depends on."""
+
+    files: Set[Path] = set()
+    for module in build.TARGET_MODULES.values():
+        files.update(build_cache.source_files(module))
+    return sorted(files)
+
+
+def snapshot(paths: Iterable[Path]) -> Dict[Path, int]:
+    """Return the modification time of each path (0 when it is missing)."""
+
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtimes[path] = 0
+    return mtimes
+
+
+def dependents(changed: Iterable[str], modules: Iterable[str]) -> List[str]:
+    """Return ``changed`` plus every module importing them, dependencies first."""
+
+    modules = list(modules)
+    imports = {
+        name: set(build_cache.local_imports(build_cache.SOURCE_ROOT / f"{name}.py"))
+        for name in modules
+    }
+    affected = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for name, deps in imports.items():
+            if name not in affected and deps & affected:
+                affected.add(name)
+                grew = True
+
+    ordered: List[str] = []
+    seen: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in sorted(imports.get(name, set()) & affected):
+            visit(dep)
+        ordered.append(name)
+
+    for name in sorted(affected):
+        visit(name)
+    return ordered
+
+
+def reload_modules(changed: Iterable[str]) -> List[str]:
+    """Reload the changed modules and their importers, then drop cached colours."""
+
+    loaded = [
+        name
+        for name, module in list(sys.modules.items())
+        if name != "__main__"
+        and (build_cache.SOURCE_ROOT / f"{name}.py").is_file()
+        and getattr(module, "__file__", None)
+    ]
+    order = [name for name in dependents(changed, loaded) if name in sys.modules]
+    for name in order:
+        importlib.reload(sys.modules[name])
+    color_cache.clear_caches()
+    return order
+
+
+def affected_targets(changed_files: Iterable[Path]) -> List[str]:
+    """Return the targets whose sources include any of the changed files."""
+
+    changed = set(changed_files)
+    return [
+        target
+        for target, module in build.TARGET_MODULES.items()
+        if changed & set(build_cache.source_files(module))
+    ]
+
+
+def palette_impact(
+    before: Mapping[str, str],
+    themes_before: Sequence[ThemeDefinition],
+    dependencies: Mapping[str, Mapping[str, List[str]]],
+) -> Optional[Dict[str, List[str]]]:
+    """Report which output keys a palette edit touches, or None if unknown."""
+
+    sources = deps.changed_sources(
+        before, deps.palette_values(), themes_before, build.default_themes()
+    )
+    if sources is None:
+        return None
+    affected = deps.impact(sources, dependencies)
+    print(f"{', '.join(sources) or 'no entries'} changed: {deps.describe_impact(affected)}")
+    return affected
+
+
+def rebuild(
+    changed_files: Sequence[Path],
+    targets: Optional[Sequence[str]],
+    package: bool,
+    dependencies: Optional[Mapping[str, Mapping[str, List[str]]]] = None,
+) -> None:
+    """Reload the changed modules and rebuild the targets they affect.
+
+    When only the palette changed and a dependency map is given, targets with
+    no output key depending on the edited entries are skipped.
+    """
+
+    start = time.perf_counter()
+    names = [path.stem for path in changed_files]
+    palette_only = dependencies is not None and set(names) == {PALETTE_MODULE}
+    if palette_only:
+        before, themes_before = deps.palette_values(), build.default_themes()
+    reload_modules(names)
+    wanted = affected_targets(changed_files)
+    if palette_only:
+        affected = palette_impact(before, themes_before, dependencies)
+        if affected is not None:
+            wanted = [target for target in wanted if target in affected]
+    if targets:
+        wanted = [target for target in wanted if target in targets]
+    if not wanted:
+        print(f"{', '.join(names)} changed; no watched target depends on it")
+        return
+    durations, manifest = build.build(wanted, package=package)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{', '.join(path.name for path in changed_files)} changed: rebuilt "
+        f"{', '.join(sorted({name.split('.')[0] for name in durations})) or 'nothing'}"
+        f" in {elapsed * 1000:.1f} ms"
+    )
+    print(manifest.summary())
+    print(output.format_stats())
+
+
+def watch(
+    targets: Optional[Sequence[str]] = None,
+    package: bool = True,
+    interval: float = DEFAULT_INTERVAL,
+) -> None:
+    """Build once, then poll the sources and rebuild on every change."""
+
+    build.build(targets, package=package)
+    # The sources as of the last snapshot; the map is only used if probed from them.
+    sources = deps.sources_key(build.default_themes())
+    loaded = deps.load_dependency_map()
+    refresh = None if loaded and loaded[0] == sources else deps.refresh_in_background()
+    files = watched_files()
+    mtimes = snapshot(files)
+    print(f"watching {len(files)} files (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            if refresh is not None and refresh.poll() is not None:
+                if refresh.returncode == 0:
+                    loaded = deps.load_dependency_map()
+                refresh = None
+            current = snapshot(files)
+            changed = [path for path in files if current[path] != mtimes[path]]
+            if not changed:
+                continue
+            mtimes = current
+            # Which keys read which entries moves with the values themselves
+            # (contrast solves switch on and off), so a map probed from any
+            # other sources could skip a target that needs rebuilding.
+            fresh = loaded is not None and loaded[0] == sources
+            try:
+                rebuild(changed, targets, package, loaded[1] if fresh else None)
+            except Exception:  # keep watching through syntax errors and bad palettes
+                traceback.print_exc()
+            if refresh is not None:
+                refresh.terminate()
+            refresh = deps.refresh_in_background()
+            files = watched_files()
+            mtimes = snapshot(files)
+            sources = deps.sources_key(build.default_themes())
+    finally:
+        if refresh is not None:
+            refresh.terminate()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Parse arguments and start watching."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", help="targets to rebuild (default: all)")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="polling interval in seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-package",
+        action="store_true",
+        help="skip packaging the VSCode extension",
+    )
+    args = parser.parse_args(argv)
+    try:
+        watch(args.targets or None, package=not args.no_package, interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import json
+import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Union
 
+import instrument
 from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
+from ghostty import ANSI_SLOT_NAMES
+from output import write_chunks_if_changed
+from resolved_theme import ResolvedTheme, resolve_theme
 
 SCHEMA_URL = "https://zed.dev/schema/themes/v0.2.0.json"
 
@@ -22,258 +28,258 @@ def hex_rgba(color: str, alpha: float = 1.0) -> str:
     return f"#{color}{a:02x}"
 
 
-def mix(color_a: str, color_b: str, amount: float) -> str:
-    """Mix two colors together."""
-    amount = max(0.0, min(1.0, amount))
-    color_a = color_a.lstrip("#")
-    color_b = color_b.lstrip("#")
-    ar, ag, ab = (int(color_a[i : i + 2], 16) for i in (0, 2, 4))
-    br, bg, bb = (int(color_b[i : i + 2], 16) for i in (0, 2, 4))
-    rr = round(ar + (br - ar) * amount)
-    rg = round(ag + (bg - ag) * amount)
-    rb = round(ab + (bb - ab) * amount)
-    return f"#{rr:02x}{rg:02x}{rb:02x}"
+class Const(NamedTuple):
+    """A style value emitted verbatim for every theme."""
 
+    value: object
 
-def build_style(theme: ThemeDefinition) -> Dict[str, object]:
-    """Build the style dictionary for a theme."""
-    bg = theme.background.hex_value
-    fg = theme.body_text.hex_value
-    muted = theme.comment_text.hex_value
-    selection = theme.selection.hex_value
-
-    is_dark = theme.slug == "inverse"
-    blend_target = "#ffffff" if is_dark else "#000000"
-
-    # Derive colors
-    surface = mix(bg, blend_target, 0.04)
-    border = mix(bg, blend_target, 0.15)
-    border_variant = mix(bg, blend_target, 0.10)
-    element_bg = mix(bg, blend_target, 0.05)
-    element_hover = mix(bg, blend_target, 0.10)
-    element_active = mix(bg, blend_target, 0.20)
-
-    # Accent color (using teal for info/links)
-    accent = get_color("teal-100").hex_value if is_dark else get_color("teal").hex_value
-
-    # Status colors - use brighter variants on dark backgrounds for contrast
-    if is_dark:
-        error_color = "#ff6666"  # Brighter red for WCAG AA on dark bg (5.03:1)
-        success_color = "#66cc99"  # Brighter green for WCAG AA on dark bg (7.30:1)
-    else:
-        error_color = get_color("crimson").hex_value
-        success_color = get_color("jade").hex_value
-    warning_color = get_color("mandarin").hex_value
-
-    style = {
-        # Borders
-        "border": hex_rgba(border),
-        "border.variant": hex_rgba(border_variant),
-        "border.focused": hex_rgba(accent),
-        "border.selected": hex_rgba(selection),
-        "border.transparent": "#00000000",
-        "border.disabled": hex_rgba(border),
-        # Surfaces
-        "elevated_surface.background": hex_rgba(surface),
-        "surface.background": hex_rgba(surface),
-        "background": hex_rgba(bg),
-        # Elements
-        "element.background": hex_rgba(element_bg),
-        "element.hover": hex_rgba(element_hover),
-        "element.active": hex_rgba(element_active),
-        "element.selected": hex_rgba(element_active),
-        "element.disabled": hex_rgba(element_bg),
-        # Ghost elements
-        "ghost_element.background": "#00000000",
-        "ghost_element.hover": hex_rgba(element_hover),
-        "ghost_element.active": hex_rgba(element_active),
-        "ghost_element.selected": hex_rgba(element_active),
-        "ghost_element.disabled": hex_rgba(element_bg),
-        # Text
-        "text": hex_rgba(fg),
-        "text.muted": hex_rgba(muted),
-        "text.placeholder": hex_rgba(muted),
-        "text.disabled": hex_rgba(muted),
-        "text.accent": hex_rgba(accent),
-        # Icons
-        "icon": hex_rgba(fg),
-        "icon.muted": hex_rgba(muted),
-        "icon.disabled": hex_rgba(muted),
-        "icon.placeholder": hex_rgba(muted),
-        "icon.accent": hex_rgba(accent),
-        # UI chrome
-        "status_bar.background": hex_rgba(bg),
-        "title_bar.background": hex_rgba(bg),
-        "title_bar.inactive_background": hex_rgba(element_bg),
-        "toolbar.background": hex_rgba(surface),
-        "tab_bar.background": hex_rgba(surface),
-        "tab.inactive_background": hex_rgba(surface),
-        "tab.active_background": hex_rgba(bg),
-        # Search
-        "search.match_background": hex_rgba(selection, 0.4),
-        "search.active_match_background": hex_rgba(warning_color, 0.4),
-        # Panel
-        "panel.background": hex_rgba(surface),
-        "panel.focused_border": None,
-        "pane.focused_border": None,
-        # Scrollbar
-        "scrollbar.thumb.background": hex_rgba(mix(bg, blend_target, 0.3), 0.3),
-        "scrollbar.thumb.hover_background": hex_rgba(element_hover),
-        "scrollbar.thumb.border": hex_rgba(element_hover),
-        "scrollbar.track.background": "#00000000",
-        "scrollbar.track.border": hex_rgba(border_variant),
-        # Editor
-        "editor.foreground": hex_rgba(fg),
-        "editor.background": hex_rgba(bg),
-        "editor.gutter.background": hex_rgba(bg),
-        "editor.subheader.background": hex_rgba(surface),
-        "editor.active_line.background": hex_rgba(surface, 0.75),
-        "editor.highlighted_line.background": hex_rgba(surface),
-        "editor.line_number": hex_rgba(muted),
-        "editor.active_line_number": hex_rgba(fg),
-        "editor.invisible": hex_rgba(muted),
-        "editor.wrap_guide": hex_rgba(border, 0.05),
-        "editor.active_wrap_guide": hex_rgba(border, 0.1),
-        # Document highlights (selections)
-        "editor.document_highlight.read_background": hex_rgba(
-            selection, 0.4 if is_dark else 0.75
-        ),
-        "editor.document_highlight.write_background": hex_rgba(selection, 0.4),
-        # Terminal
-        "terminal.background": hex_rgba(bg),
-        "terminal.foreground": hex_rgba(fg),
-        "terminal.bright_foreground": hex_rgba(fg),
-        "terminal.dim_foreground": hex_rgba(muted),
-        # Terminal ANSI colors
-        "terminal.ansi.black": hex_rgba(get_color("slate").hex_value),
-        "terminal.ansi.red": hex_rgba(get_color("claret").hex_value),
-        "terminal.ansi.green": hex_rgba(get_color("jade").hex_value),
-        "terminal.ansi.yellow": hex_rgba(get_color("mandarin").hex_value),
-        "terminal.ansi.blue": hex_rgba(get_color("oxford").hex_value),
-        "terminal.ansi.magenta": hex_rgba(get_color("velvet").hex_value),
-        "terminal.ansi.cyan": hex_rgba(get_color("teal").hex_value),
-        "terminal.ansi.white": hex_rgba(get_color("paper").hex_value),
-        "terminal.ansi.bright_black": hex_rgba(get_color("black-70").hex_value),
-        "terminal.ansi.bright_red": hex_rgba(get_color("crimson").hex_value),
-        "terminal.ansi.bright_green": hex_rgba(get_color("wasabi").hex_value),
-        "terminal.ansi.bright_yellow": hex_rgba(get_color("lemon").hex_value),
-        "terminal.ansi.bright_blue": hex_rgba(get_color("light-blue").hex_value),
-        "terminal.ansi.bright_magenta": hex_rgba(get_color("candy").hex_value),
-        "terminal.ansi.bright_cyan": hex_rgba(get_color("teal-80").hex_value),
-        "terminal.ansi.bright_white": hex_rgba(get_color("white").hex_value),
-        "terminal.ansi.dim_black": hex_rgba(get_color("black-40").hex_value),
-        "terminal.ansi.dim_red": hex_rgba(mix(get_color("claret").hex_value, bg, 0.3)),
-        "terminal.ansi.dim_green": hex_rgba(mix(get_color("jade").hex_value, bg, 0.3)),
-        "terminal.ansi.dim_yellow": hex_rgba(
-            mix(get_color("mandarin").hex_value, bg, 0.3)
-        ),
-        "terminal.ansi.dim_blue": hex_rgba(mix(get_color("oxford").hex_value, bg, 0.3)),
-        "terminal.ansi.dim_magenta": hex_rgba(
-            mix(get_color("velvet").hex_value, bg, 0.3)
-        ),
-        "terminal.ansi.dim_cyan": hex_rgba(mix(get_color("teal").hex_value, bg, 0.3)),
-        "terminal.ansi.dim_white": hex_rgba(muted),
-        # Links
-        "link_text.hover": hex_rgba(accent),
-        # Version control
-        "version_control.added": hex_rgba(success_color),
-        "version_control.modified": hex_rgba(warning_color),
-        "version_control.deleted": hex_rgba(error_color),
-        "version_control.word_added": hex_rgba(success_color, 0.35),
-        "version_control.word_deleted": hex_rgba(error_color, 0.35),
-        "version_control.conflict_marker.ours": hex_rgba(success_color, 0.1),
-        "version_control.conflict_marker.theirs": hex_rgba(accent, 0.1),
-        # Status colors
-        "conflict": hex_rgba(warning_color),
-        "conflict.background": hex_rgba(warning_color, 0.1),
-        "conflict.border": hex_rgba(warning_color, 0.3),
-        "created": hex_rgba(success_color),
-        "created.background": hex_rgba(success_color, 0.1),
-        "created.border": hex_rgba(success_color, 0.3),
-        "deleted": hex_rgba(error_color),
-        "deleted.background": hex_rgba(error_color, 0.1),
-        "deleted.border": hex_rgba(error_color, 0.3),
-        "error": hex_rgba(error_color),
-        "error.background": hex_rgba(error_color, 0.1),
-        "error.border": hex_rgba(error_color, 0.3),
-        "hidden": hex_rgba(muted),
-        "hidden.background": hex_rgba(bg),
-        "hidden.border": hex_rgba(border),
-        "hint": hex_rgba(accent),
-        "hint.background": hex_rgba(accent, 0.05),
-        "hint.border": hex_rgba(accent, 0.3),
-        "ignored": hex_rgba(muted),
-        "ignored.background": hex_rgba(bg),
-        "ignored.border": hex_rgba(border),
-        "info": hex_rgba(accent),
-        "info.background": hex_rgba(accent, 0.1),
-        "info.border": hex_rgba(accent, 0.3),
-        "modified": hex_rgba(warning_color),
-        "modified.background": hex_rgba(warning_color, 0.1),
-        "modified.border": hex_rgba(warning_color, 0.3),
-        "predictive": hex_rgba(muted),
-        "predictive.background": hex_rgba(muted, 0.1),
-        "predictive.border": hex_rgba(muted, 0.3),
-        "renamed": hex_rgba(accent),
-        "renamed.background": hex_rgba(accent, 0.1),
-        "renamed.border": hex_rgba(accent, 0.3),
-        "success": hex_rgba(success_color),
-        "success.background": hex_rgba(success_color, 0.1),
-        "success.border": hex_rgba(success_color, 0.3),
-        "unreachable": hex_rgba(muted),
-        "unreachable.background": hex_rgba(bg),
-        "unreachable.border": hex_rgba(border),
-        "warning": hex_rgba(warning_color),
-        "warning.background": hex_rgba(warning_color, 0.1),
-        "warning.border": hex_rgba(warning_color, 0.3),
-        # Players (for collaborative editing)
-        "players": [
-            {
-                "cursor": hex_rgba(fg),
-                "background": hex_rgba(selection),
-                "selection": hex_rgba(selection, 0.75 if is_dark else 1.0),
-            },
-            {
-                "cursor": hex_rgba(get_color("claret").hex_value),
-                "background": hex_rgba(get_color("claret").hex_value),
-                "selection": hex_rgba(get_color("claret").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("mandarin").hex_value),
-                "background": hex_rgba(get_color("mandarin").hex_value),
-                "selection": hex_rgba(get_color("mandarin").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("velvet").hex_value),
-                "background": hex_rgba(get_color("velvet").hex_value),
-                "selection": hex_rgba(get_color("velvet").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("teal").hex_value),
-                "background": hex_rgba(get_color("teal").hex_value),
-                "selection": hex_rgba(get_color("teal").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("crimson").hex_value),
-                "background": hex_rgba(get_color("crimson").hex_value),
-                "selection": hex_rgba(get_color("crimson").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("lemon").hex_value),
-                "background": hex_rgba(get_color("lemon").hex_value),
-                "selection": hex_rgba(get_color("lemon").hex_value, 0.24),
-            },
-            {
-                "cursor": hex_rgba(get_color("jade").hex_value),
-                "background": hex_rgba(get_color("jade").hex_value),
-                "selection": hex_rgba(get_color("jade").hex_value, 0.24),
-            },
-        ],
-    }
 
+# A style rule is (key, source) or (key, source, alpha). Sources name a
+# ResolvedTheme role, a fixed palette entry ("palette:<name>"), an ANSI slot
+# ("ansi:<i>", "ansi_dim:<i>") or a Const. Alpha is a float or a
+# (light, dark) pair.
+Alpha = Union[float, Tuple[float, float]]
+Source = Union[str, Const]
+StyleRule = Union[Tuple[str, Source], Tuple[str, Source, Alpha]]
+
+STYLE_TABLE: Tuple[StyleRule, ...] = (
+    # Borders
+    ("border", "border"),
+    ("border.variant", "border_variant"),
+    ("border.focused", "accent"),
+    ("border.selected", "selection"),
+    ("border.transparent", Const("#00000000")),
+    ("border.disabled", "border"),
+    # Surfaces
+    ("elevated_surface.background", "surface"),
+    ("surface.background", "surface"),
+    ("background", "background"),
+    # Elements
+    ("element.background", "element"),
+    ("element.hover", "element_hover"),
+    ("element.active", "element_active"),
+    ("element.selected", "element_active"),
+    ("element.disabled", "element"),
+    # Ghost elements
+    ("ghost_element.background", Const("#00000000")),
+    ("ghost_element.hover", "element_hover"),
+    ("ghost_element.active", "element_active"),
+    ("ghost_element.selected", "element_active"),
+    ("ghost_element.disabled", "element"),
+    # Text
+    ("text", "foreground"),
+    ("text.muted", "comment"),
+    ("text.placeholder", "comment"),
+    ("text.disabled", "comment"),
+    ("text.accent", "accent"),
+    # Icons
+    ("icon", "foreground"),
+    ("icon.muted", "comment"),
+    ("icon.disabled", "comment"),
+    ("icon.placeholder", "comment"),
+    ("icon.accent", "accent"),
+    # UI chrome
+    ("status_bar.background", "background"),
+    ("title_bar.background", "background"),
+    ("title_bar.inactive_background", "element"),
+    ("toolbar.background", "surface"),
+    ("tab_bar.background", "surface"),
+    ("tab.inactive_background", "surface"),
+    ("tab.active_background", "background"),
+    # Search
+    ("search.match_background", "selection", 0.4),
+    ("search.active_match_background", "warning", 0.4),
+    # Panel
+    ("panel.background", "surface"),
+    ("panel.focused_border", Const(None)),
+    ("pane.focused_border", Const(None)),
+    # Scrollbar
+    ("scrollbar.thumb.background", "scrollbar_thumb", 0.3),
+    ("scrollbar.thumb.hover_background", "element_hover"),
+    ("scrollbar.thumb.border", "element_hover"),
+    ("scrollbar.track.background", Const("#00000000")),
+    ("scrollbar.track.border", "border_variant"),
+    # Editor
+    ("editor.foreground", "foreground"),
+    ("editor.background", "background"),
+    ("editor.gutter.background", "background"),
+    ("editor.subheader.background", "surface"),
+    ("editor.active_line.background", "surface", 0.75),
+    ("editor.highlighted_line.background", "surface"),
+    ("editor.line_number", "comment"),
+    ("editor.active_line_number", "foreground"),
+    ("editor.invisible", "comment"),
+    ("editor.wrap_guide", "border", 0.05),
+    ("editor.active_wrap_guide", "border", 0.1),
+    # Document highlights (selections)
+    ("editor.document_highlight.read_background", "selection", (0.75, 0.4)),
+    ("editor.document_highlight.write_background", "selection", 0.4),
+    # Terminal
+    ("terminal.background", "background"),
+    ("terminal.foreground", "foreground"),
+    ("terminal.bright_foreground", "foreground"),
+    ("terminal.dim_foreground", "comment"),
+    # Terminal ANSI colors, shared with the Ghostty and Zellij palettes
+    *(
+        (f"terminal.ansi.{slot}", f"ansi:{index}")
+        for index, slot in enumerate(ANSI_SLOT_NAMES)
+    ),
+    *(
+        (f"terminal.ansi.dim_{slot}", f"ansi_dim:{index}")
+        for index, slot in enumerate(ANSI_SLOT_NAMES[:8])
+    ),
+    # Links
+    ("link_text.hover", "accent"),
+    # Version control
+    ("version_control.added", "success"),
+    ("version_control.modified", "warning"),
+    ("version_control.deleted", "error"),
+    ("version_control.word_added", "success", 0.35),
+    ("version_control.word_deleted", "error", 0.35),
+    ("version_control.conflict_marker.ours", "success", 0.1),
+    ("version_control.conflict_marker.theirs", "accent", 0.1),
+    # Status colors
+    ("conflict", "warning"),
+    ("conflict.background", "warning", 0.1),
+    ("conflict.border", "warning", 0.3),
+    ("created", "success"),
+    ("created.background", "success", 0.1),
+    ("created.border", "success", 0.3),
+    ("deleted", "error"),
+    ("deleted.background", "error", 0.1),
+    ("deleted.border", "error", 0.3),
+    ("error", "error"),
+    ("error.background", "error", 0.1),
+    ("error.border", "error", 0.3),
+    ("hidden", "comment"),
+    ("hidden.background", "background"),
+    ("hidden.border", "border"),
+    ("hint", "accent"),
+    ("hint.background", "accent", 0.05),
+    ("hint.border", "accent", 0.3),
+    ("ignored", "comment"),
+    ("ignored.background", "background"),
+    ("ignored.border", "border"),
+    ("info", "accent"),
+    ("info.background", "accent", 0.1),
+    ("info.border", "accent", 0.3),
+    ("modified", "warning"),
+    ("modified.background", "warning", 0.1),
+    ("modified.border", "warning", 0.3),
+    ("predictive", "comment"),
+    ("predictive.background", "comment", 0.1),
+    ("predictive.border", "comment", 0.3),
+    ("renamed", "accent"),
+    ("renamed.background", "accent", 0.1),
+    ("renamed.border", "accent", 0.3),
+    ("success", "success"),
+    ("success.background", "success", 0.1),
+    ("success.border", "success", 0.3),
+    ("unreachable", "comment"),
+    ("unreachable.background", "background"),
+    ("unreachable.border", "border"),
+    ("warning", "warning"),
+    ("warning.background", "warning", 0.1),
+    ("warning.border", "warning", 0.3),
+)
+
+# Players (for collaborative editing): the local user, then one palette hue each.
+PLAYER_PALETTE_NAMES = ("claret", "mandarin", "velvet", "teal", "crimson", "lemon", "jade")
+
+PLAYER_TABLE: Tuple[Tuple[StyleRule, ...], ...] = (
+    (
+        ("cursor", "foreground"),
+        ("background", "selection"),
+        ("selection", "selection", (1.0, 0.75)),
+    ),
+    *(
+        (
+            ("cursor", f"palette:{name}"),
+            ("background", f"palette:{name}"),
+            ("selection", f"palette:{name}", 0.24),
+        )
+        for name in PLAYER_PALETTE_NAMES
+    ),
+)
+
+
+@dataclass(frozen=True)
+class StylePlan:
+    """Style tables compiled into unique sources and unique colour ops.
+
+    ``ops`` holds each distinct (source, alpha) pair once; ``style`` and
+    ``players`` map keys to op indices, in table order.
+    """
+
+    sources: Tuple[object, ...]
+    ops: Tuple[Tuple[int, Alpha], ...]
+    style: Tuple[Tuple[str, int], ...]
+    players: Tuple[Tuple[Tuple[str, int], ...], ...]
+
+
+def compile_style_plan(
+    table: Sequence[StyleRule], players: Sequence[Sequence[StyleRule]]
+) -> StylePlan:
+    """Deduplicate the sources and colour ops referenced by the style tables."""
+
+    sources: Dict[object, int] = {}
+    ops: Dict[Tuple[int, Alpha], int] = {}
+
+    def op_index(rule: StyleRule) -> Tuple[str, int]:
+        key, source, *rest = rule
+        alpha = rest[0] if rest else 1.0
+        source_index = sources.setdefault(source, len(sources))
+        if isinstance(source, Const):
+            alpha = 1.0
+        return key, ops.setdefault((source_index, alpha), len(ops))
+
+    style = tuple(op_index(rule) for rule in table)
+    player_ops = tuple(tuple(op_index(rule) for rule in player) for player in players)
+    return StylePlan(tuple(sources), tuple(ops), style, player_ops)
+
+
+STYLE_PLAN = compile_style_plan(STYLE_TABLE, PLAYER_TABLE)
+
+
+def source_value(resolved: ResolvedTheme, source: object) -> object:
+    """Look up a style-table source for a resolved theme."""
+
+    if isinstance(source, Const):
+        return source.value
+    kind, _, argument = source.partition(":")
+    if kind == "palette":
+        return get_color(argument).hex_value
+    if kind in ("ansi", "ansi_dim"):
+        return getattr(resolved, kind)[int(argument)]
+    return getattr(resolved, source)
+
+
+def evaluate_plan(plan: StylePlan, resolved: ResolvedTheme) -> Dict[str, object]:
+    """Compute each unique colour of the plan once and lay out the style."""
+
+    values = [source_value(resolved, source) for source in plan.sources]
+    colors: List[object] = []
+    for source_index, alpha in plan.ops:
+        value = values[source_index]
+        if isinstance(plan.sources[source_index], Const):
+            colors.append(value)
+            continue
+        if isinstance(alpha, tuple):
+            alpha = alpha[resolved.is_dark]
+        colors.append(hex_rgba(value, alpha))
+
+    style: Dict[str, object] = {key: colors[index] for key, index in plan.style}
+    style["players"] = [
+        {key: colors[index] for key, index in player} for player in plan.players
+    ]
     return style
 
 
+def build_style(theme: ThemeDefinition) -> Dict[str, object]:
+    """Build the style dictionary for a theme."""
+    return evaluate_plan(STYLE_PLAN, resolve_theme(theme))
+
+
 def build_syntax(theme: ThemeDefinition) -> Dict[str, Dict[str, object]]:
     """Build syntax highlighting rules - minimal highlighting with only comments muted."""
     fg = theme.body_text.hex_value
@@ -345,7 +351,7 @@ def build_syntax(theme: ThemeDefinition) -> Dict[str, Dict[str, object]]:
 
 def build_theme(theme: ThemeDefinition) -> Dict[str, object]:
     """Build a complete theme definition."""
-    appearance = "dark" if theme.slug == "inverse" else "light"
+    appearance = theme.appearance
     style = build_style(theme)
 
     # Extract players and syntax from style dict
@@ -359,24 +365,61 @@ def build_theme(theme: ThemeDefinition) -> Dict[str, object]:
     }
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
-    """Generate Zed themes."""
+BUNDLE_METADATA = {
+    "$schema": SCHEMA_URL,
+    "name": "Financial Times",
+    "author": "meriksen",
+}
+
+
+def encode_theme(theme: ThemeDefinition, minify: bool = False) -> str:
+    """Serialize one theme as it appears inside the bundle's ``themes`` list."""
+
+    with instrument.span("zed", "payload"):
+        payload = build_theme(theme)
+    with instrument.span("zed", "serialize"):
+        if minify:
+            return json.dumps(payload, separators=(",", ":"))
+        return "    " + json.dumps(payload, indent=2).replace("\n", "\n    ")
+
+
+def iter_bundle_json(themes: Iterable[ThemeDefinition], minify: bool = False) -> Iterator[str]:
+    """Yield the bundle JSON in chunks, building and encoding one theme at a time.
+
+    The indented output is byte-identical to ``json.dumps(bundle, indent=2)``;
+    ``minify`` drops all insignificant whitespace.
+    """
+
+    if minify:
+        header = json.dumps(BUNDLE_METADATA, separators=(",", ":"))[:-1]
+        yield f'{header},"themes":['
+        first, separator, footer, empty_footer = "", ",", "]}", "]}"
+    else:
+        header = json.dumps(BUNDLE_METADATA, indent=2)[:-2]
+        yield f'{header},\n  "themes": ['
+        first, separator, footer, empty_footer = "\n", ",\n", "\n  ]\n}\n", "]\n}\n"
+
+    empty = True
+    for theme in themes:
+        yield (first if empty else separator) + encode_theme(theme, minify)
+        empty = False
+    yield empty_footer if empty else footer
+
+
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/zed"),
+    minify: bool = False,
+) -> None:
+    """Generate Zed themes, streaming the bundle to disk one theme at a time."""
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    payload = {
-        "$schema": SCHEMA_URL,
-        "name": "Financial Times",
-        "author": "meriksen",
-        "themes": [build_theme(theme) for theme in themes],
-    }
-
-    out_dir = Path("build/zed")
-    out_dir.mkdir(parents=True, exist_ok=True)
     path = out_dir / "financial-times.json"
-    path.write_text(json.dumps(payload, indent=2) + "\n")
+    with instrument.span("zed", "write"):
+        write_chunks_if_changed(path, iter_bundle_json(themes, minify))
     print(f"wrote {path}")
 
 
 if __name__ == "__main__":
-    main()
+    main(minify="--minify" in sys.argv[1:])
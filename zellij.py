@@ -5,17 +5,18 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Iterable, List
 
-from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition, get_color
-from ghostty import ANSI_PALETTE_NAMES, build_palette_values, ensure_contrast
+import instrument
+from ft_palette import INVERSE_THEME, STANDARD_THEME, ThemeDefinition
+from ghostty import ANSI_PALETTE_NAMES
+from output import write_if_changed
+from palette_store import color_record
+from resolved_theme import resolve_theme
 
 
 def hex_to_rgb_tokens(value: str) -> str:
     """Convert a hex colour into space-separated RGB tokens."""
 
-    value = value.lstrip("#")
-    red = int(value[0:2], 16)
-    green = int(value[2:4], 16)
-    blue = int(value[4:6], 16)
+    red, green, blue = color_record(value).rgb
     return f"{red} {green} {blue}"
 
 
@@ -30,25 +31,18 @@ def render_kdl_color(value: str | int) -> str:
 def build_theme_lines(theme: ThemeDefinition) -> List[str]:
     """Compose the KDL theme lines for a given FT theme."""
 
-    ansi_palette = {
-        name: f"#{value}"
-        for name, value in zip(ANSI_PALETTE_NAMES, build_palette_values(theme))
-    }
-
-    if theme.slug == "standard":
-        panel_bg = get_color("paper-dim").hex_value
-        ribbon_bg = get_color("black-20").hex_value
-    else:
-        panel_bg = get_color("slate-dim").hex_value
-        ribbon_bg = get_color("black-90").hex_value
+    resolved = resolve_theme(theme)
+    ansi_palette = dict(zip(ANSI_PALETTE_NAMES, resolved.ansi))
 
-    foreground = theme.body_text.hex_value
-    background = theme.background.hex_value
-    selection_bg = theme.selection.hex_value
+    panel_bg = resolved.panel
+    ribbon_bg = resolved.ribbon
+    foreground = resolved.foreground
+    background = resolved.background
+    selection_bg = resolved.selection
     accent_bg = ansi_palette["teal"]
-    accent_text = ensure_contrast(background, accent_bg, foreground)
-    ribbon_text = ensure_contrast(foreground, ribbon_bg, background)
-    selected_text = ensure_contrast(foreground, selection_bg, background)
+    accent_text = resolved.terminal_accent_text
+    ribbon_text = resolved.ribbon_text
+    selected_text = resolved.selection_text
 
     emphasis_0 = ansi_palette["mandarin"]
     emphasis_1 = ansi_palette["light-blue"]
@@ -56,8 +50,8 @@ def build_theme_lines(theme: ThemeDefinition) -> List[str]:
     emphasis_3 = ansi_palette["candy"]
     success = ansi_palette["wasabi"]
     error = ansi_palette["crimson"]
-    frame = ensure_contrast(ansi_palette["teal"], background, foreground)
-    highlight = ensure_contrast(ansi_palette["mandarin"], background, foreground)
+    frame = resolved.terminal_frame
+    highlight = resolved.terminal_highlight
 
     sections = {
         "text_unselected": {
@@ -192,19 +186,25 @@ def write_theme(theme: ThemeDefinition, out_dir: Path) -> Path:
     """Write a Zellij theme file for the given theme object."""
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    lines = build_theme_lines(theme)
+    with instrument.span("zellij", "payload"):
+        lines = build_theme_lines(theme)
+    with instrument.span("zellij", "serialize"):
+        text = "\n".join(lines) + "\n"
     path = out_dir / f"financial-times-{theme.slug}.kdl"
-    path.write_text("\n".join(lines) + "\n")
+    with instrument.span("zellij", "write"):
+        write_if_changed(path, text)
     return path
 
 
-def main(themes: Iterable[ThemeDefinition] | None = None) -> None:
+def main(
+    themes: Iterable[ThemeDefinition] | None = None,
+    out_dir: Path = Path("build/zellij"),
+) -> None:
     """Generate Zellij themes for all configured FT variants."""
 
     if themes is None:
         themes = (STANDARD_THEME, INVERSE_THEME)
 
-    out_dir = Path("build/zellij")
     for theme in themes:
         path = write_theme(theme, out_dir)
         print(f"wrote {path}")